@@ -26,25 +26,232 @@ REQUIREMENTS:
 
 import sys
 import argparse
+import csv
+import gzip
 import subprocess
 import json
+import hashlib
 import tempfile
 import os
 import shutil
-from typing import Optional, List, Dict, Any, Tuple
+import queue
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple, Iterator, Union
 import sqlite3
 from pathlib import Path
 
+try:
+    import fcntl  # Not available on Windows
+except ImportError:
+    fcntl = None
+
+try:
+    import zstandard  # Optional: enables zstd-compressed pulls
+except ImportError:
+    zstandard = None
+
+try:
+    from isal import igzip  # Optional: ISA-L gzip decoder, several times faster than zlib
+except ImportError:
+    igzip = None
+
 # Set UTF-8 encoding for Windows
 if sys.platform.startswith('win'):
     os.environ['PYTHONIOENCODING'] = 'utf-8'
     sys.stdout.reconfigure(encoding='utf-8')
     sys.stderr.reconfigure(encoding='utf-8')
 
+# adb/sqlite3 child processes get no console window of their own on Windows - otherwise
+# each one flashes a window when the app runs without a console (pythonw, packaged builds)
+SUBPROCESS_FLAGS = {'creationflags': subprocess.CREATE_NO_WINDOW} if sys.platform.startswith('win') else {}
+
+# Applied to every sqlite3 CLI run on the device. journal_mode is deliberately left
+# alone - it is persistent and belongs to the app that owns the database.
+DEFAULT_REMOTE_PRAGMAS = [
+    'PRAGMA cache_size=-65536',     # 64 MB page cache
+    'PRAGMA mmap_size=268435456',   # Memory-map up to 256 MB of the file
+    'PRAGMA temp_store=MEMORY'      # Keep sorts/temp b-trees off flash
+]
+
+# Leading keywords of statements that modify the database
+WRITE_OPERATIONS = frozenset({'INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 'ALTER', 'REPLACE'})
+# Statements that can never modify the database (run with query_only on the local copy)
+READ_ONLY_OPERATIONS = frozenset({'SELECT', 'EXPLAIN'})
+FIRST_KEYWORD_RE = re.compile(r'\s*([A-Za-z]+)')
+# Statements that return rows (matched case-insensitively, no uppercased copy of the query)
+ROW_QUERY_RE = re.compile(r'\s*(?:SELECT|PRAGMA|EXPLAIN)\b', re.IGNORECASE)
+SELECT_RE = re.compile(r'\s*SELECT\b', re.IGNORECASE)
+LIMIT_CLAUSE_RE = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+
+# First field of `sha256sum` output
+SHA256_HEX_RE = re.compile(r'[0-9a-fA-F]{64}')
+
+# `ls -l` line; captures the date/time columns between the size and the file name
+LS_DATE_RE = re.compile(r'\S+\s+\d+\s+\S+\s+\S+\s+\d+\s+(.+?)\s+\S+\s*$')
+
+# sqlite3 CLI error prefixes: "Error: ...", "Error: near line 2: ...", "Parse error near line 2: ..."
+SQLITE_ERROR_RE = re.compile(r'(?:Error:|error near line \d+:)\s*(?:near line \d+:\s*)?(.*)', re.DOTALL)
+
+# Tables counted per UNION ALL query (SQLITE_MAX_COMPOUND_SELECT defaults to 500)
+COUNT_BATCH_SIZE = 400
+
+# Matches the end of a CREATE TABLE ... WITHOUT ROWID statement
+WITHOUT_ROWID_RE = re.compile(r'\bWITHOUT\s+ROWID\b', re.IGNORECASE)
+
+# Number of read-query results kept per tool instance
+RESULT_CACHE_SIZE = 256
+
+# Seconds a failed run-as check is trusted before the device is asked again - the database
+# may simply not exist yet (matches the web app's default PROBE_TTL)
+NEGATIVE_PROBE_TTL = 3
+
+# Kernel pipe and read buffer size for bulk transfers (Linux default pipe is 64 KB)
+PIPE_BUFFER_SIZE = 1 << 20
+F_SETPIPE_SZ = getattr(fcntl, 'F_SETPIPE_SZ', 1031)
+
+# Applied to the connection on the local (pulled) copy. The copy is a disposable snapshot
+# that can always be re-pulled, so it gets a bigger cache/mmap window and no fsyncs.
+# locking_mode=EXCLUSIVE is left out: other tool instances (Flask requests) read the same file.
+# mmap is safe with that sharing because pulls rename a new file into place instead of truncating it.
+DEFAULT_LOCAL_PRAGMAS = [
+    'PRAGMA cache_size=-131072',      # 128 MB page cache
+    'PRAGMA mmap_size=1073741824',    # Memory-map up to 1 GB of the file
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA synchronous=OFF'
+]
+
+# Uncompressed exec-out pulls of files larger than one chunk are split into ranges
+# read concurrently with dd (bounded, to go easy on device I/O)
+RANGE_PULL_CHUNK_SIZE = 32 * 1024 * 1024
+RANGE_PULL_WORKERS = 4
+
+# Algorithms accepted by `adb pull -z` (adb 31+ with a compression-capable adbd)
+ADB_COMPRESSION_ALGORITHMS = ('any', 'brotli', 'lz4', 'zstd')
+
+# Raised by the decompressors on a corrupt or truncated transfer
+DECOMPRESSION_ERRORS = (OSError, EOFError) + ((zstandard.ZstdError,) if zstandard else ())
+
+# Marks the exit status line appended to streamed `adb exec-out` output
+STREAM_STATUS_MARKER = "__SQLITE_EXIT_STATUS__"
+STREAM_STATUS_MARKER_BYTES = STREAM_STATUS_MARKER.encode()
+
+class AdbShellSession:
+    """
+    A long-lived `adb shell` process that runs commands one at a time.
+
+    Each command's stdout and stderr are merged and framed by a unique sentinel
+    line carrying its exit status, so many commands share one shell instead of
+    paying adb's per-invocation startup cost.
+    """
+
+    def __init__(self, adb_cmd: List[str]):
+        """
+        Args:
+            adb_cmd: ADB command prefix (e.g. ['adb', '-s', serial])
+        """
+        self.adb_cmd = list(adb_cmd)
+        self._proc = None
+        self._chunks = None
+        self._lock = threading.Lock()
+        sentinel = f"__ADB_SHELL_END_{uuid.uuid4().hex}__"
+        self._sentinel_cmd = f"printf '\\n{sentinel}%d\\n' $?"
+        # A device shell on a pty turns the sentinel's newlines into \r\n
+        self._sentinel_re = re.compile(rf"\r?\n{sentinel}(\d+)\r?\n".encode())
+
+    def _start(self):
+        """Spawn the shell process and the thread draining its output."""
+        self._proc = subprocess.Popen(self.adb_cmd + ['shell'], stdin=subprocess.PIPE,
+                                      stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0, **SUBPROCESS_FLAGS)
+        self._chunks = queue.Queue()
+        threading.Thread(target=self._pump, args=(self._proc.stdout, self._chunks), daemon=True).start()
+
+    @staticmethod
+    def _pump(stream, chunks: queue.Queue):
+        """Forward raw output chunks to the queue; None marks end of stream."""
+        while True:
+            data = stream.read(65536)
+            if not data:
+                stream.close()
+                chunks.put(None)
+                return
+            chunks.put(data)
+
+    def run(self, command: str, timeout: float = 10) -> subprocess.CompletedProcess:
+        """
+        Run a shell command on the device.
+
+        Args:
+            command: Shell command line
+            timeout: Seconds to wait for the command to finish
+
+        Returns:
+            CompletedProcess with merged stdout/stderr in stdout
+
+        Raises:
+            subprocess.TimeoutExpired: If the command doesn't finish in time (the session is restarted)
+        """
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                self._start()
+
+            # stdin is redirected so a command can never consume the session's input
+            self._proc.stdin.write(f"{{ {command}\n}} </dev/null 2>&1\n{self._sentinel_cmd}\n".encode())
+
+            deadline = time.monotonic() + timeout
+            buf = bytearray()
+            search_from = 0
+            while True:
+                match = self._sentinel_re.search(buf, search_from)
+                if match:
+                    break
+                search_from = max(0, len(buf) - 256)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._terminate()
+                    raise subprocess.TimeoutExpired(command, timeout)
+                try:
+                    chunk = self._chunks.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+
+                if chunk is None:
+                    # Shell exited (device disconnected) - report it like adb does
+                    self._terminate()
+                    return subprocess.CompletedProcess(command, 255, stdout=buf.decode('utf-8', errors='replace'), stderr='')
+                buf += chunk
+
+            # Decode once, straight from the receive buffer - no intermediate copies of large results
+            output = str(memoryview(buf)[:match.start()], 'utf-8', 'replace')
+            return subprocess.CompletedProcess(command, int(match.group(1)), stdout=output, stderr='')
+
+    def _terminate(self):
+        if self._proc is not None:
+            try:
+                self._proc.kill()
+                self._proc.wait(timeout=5)
+                # stdout is closed by the pump thread once it has drained it
+                self._proc.stdin.close()
+            except Exception:
+                pass
+            self._proc = None
+
+    def close(self):
+        """Terminate the shell process."""
+        with self._lock:
+            self._terminate()
+
 class SQLiteADBQueryTool:
     def __init__(self, package_name: str = "com.winitsoftware.emiratessnacks", db_name: str = "master_data.db",
                  force_local: bool = False, use_cache: bool = True, force_pull: bool = False, user_id: Optional[int] = None,
-                 device_serial: Optional[str] = None):
+                 device_serial: Optional[str] = None, adb_compression: Optional[str] = None):
         """
         Initialize the SQLite ADB query tool.
 
@@ -56,7 +263,11 @@ class SQLiteADBQueryTool:
             force_pull: Force re-pull even if cache is valid (default: False)
             user_id: Android user ID for cloned apps (e.g., 95 for cloned app). If None, uses default user (0)
             device_serial: Specific device serial to use (e.g., '192.168.0.237:5000' for WiFi ADB)
+            adb_compression: Compress pulls in the adb transport (`adb pull -z`) with one of
+                ADB_COMPRESSION_ALGORITHMS instead of gzip/zstd on the device. None disables it.
         """
+        if adb_compression is not None and adb_compression not in ADB_COMPRESSION_ALGORITHMS:
+            raise ValueError(f"Unsupported adb compression: {adb_compression}")
         self.package_name = package_name
         self.db_name = db_name
         self.local_db_path = None
@@ -65,15 +276,55 @@ class SQLiteADBQueryTool:
         self.force_pull = force_pull
         self.user_id = user_id
         self.device_serial = device_serial
+        self.adb_compression = adb_compression
+        # Command prefixes are fixed for the tool's lifetime, so build them once
+        user_flag = f" --user {user_id}" if user_id is not None else ""
+        self._runas_prefix = f"run-as {package_name}{user_flag}"
+        self._adb_prefix = ['adb', '-s', device_serial] if device_serial else ['adb']
         self.run_as_supported = None  # Cache run-as support check
+        self._run_as_retry_at = 0.0  # When a negative run-as check may be repeated (time.monotonic())
+        self._adb_connected = False  # Only a successful device check is memoized
+        self._thread_state = threading.local()  # Per-thread last_error and pinned change tokens (the web app shares one tool)
         self.last_error = None  # Store last error message for API responses
+        self._resolved_db_path = None  # Result of the last location probe
+        self._db_path_probed = False  # Location probe is memoized (including a negative result)
+        self._has_wal = False
+        self._has_shm = False
+        self._sqlite3_path_cache = None  # Memoized result of ensure_sqlite3_on_device
+        self._sqlite3_probed = False
+        self._device_commands = {}  # Memoized `which` probes (gzip, zstd)
+        self._shell = None  # Persistent adb shell session, started lazily
+        self.pragmas = list(DEFAULT_REMOTE_PRAGMAS)  # Applied at sqlite3 CLI startup for remote queries
+        self.local_pragmas = list(DEFAULT_LOCAL_PRAGMAS)  # Applied when opening the local copy
+        self.autocheckpoint = True  # Run PRAGMA wal_checkpoint(TRUNCATE) after remote writes
+        self.verify_pulls = False  # Compare pulls with the device's sha256sum (re-reads the file on the device)
+        self._pulled_sha256 = None  # SHA-256 of the last compressed pull, hashed as it was written
+        self._local_generation = 0  # Bumped when the local copy is replaced; per-thread connections reopen
+        self._metadata_cache = None  # Parsed cache metadata file, loaded on first use
+        self._result_cache = OrderedDict()  # (change token, query) -> rows, least recently used first
+        self._cache_lock = threading.Lock()  # Guards the result and schema caches (and _local_generation) across threads
+        self._pull_lock = threading.RLock()  # One pull of the local copy at a time
+        self._pulled_version = None  # _get_device_db_version() the local copy was pulled (or last pushed) at
+        self._schema_cache = {}  # table name -> PRAGMA table_info rows
+        self._schema_version = None  # get_data_version() the schema cache belongs to
+        self._write_generation = 0  # Bumped on every write through this tool (part of get_data_version)
 
         # Setup cache directory
         self.cache_dir = Path(tempfile.gettempdir()) / "adb_sqlite_cache"
         self.cache_dir.mkdir(exist_ok=True)
-        cache_suffix = f"_user{user_id}" if user_id else ""
-        device_suffix = f"_{device_serial.replace(':', '_').replace('.', '_')}" if device_serial else ""
-        self.cache_metadata_file = self.cache_dir / f"{package_name}_{db_name}{cache_suffix}{device_suffix}.json"
+        # Fixed-length name per (package, db, user, device) - serials like 192.168.0.237:5000 make long paths
+        cache_key = f"{package_name}|{db_name}|{user_id or ''}|{device_serial or ''}"
+        cache_hash = hashlib.blake2b(cache_key.encode(), digest_size=16).hexdigest()
+        self.cache_metadata_file = self.cache_dir / f"{cache_hash}.json"
+
+    @property
+    def last_error(self) -> Optional[str]:
+        """Error message of the last failed operation on the calling thread (None if there was none)."""
+        return getattr(self._thread_state, 'last_error', None)
+
+    @last_error.setter
+    def last_error(self, message: Optional[str]):
+        self._thread_state.last_error = message
 
     def _get_run_as_cmd(self, command: str = "") -> str:
         """
@@ -85,10 +336,22 @@ class SQLiteADBQueryTool:
         Returns:
             str: Full run-as command string
         """
-        user_flag = f" --user {self.user_id}" if self.user_id is not None else ""
         if command:
-            return f"run-as {self.package_name}{user_flag} {command}"
-        return f"run-as {self.package_name}{user_flag}"
+            return f"{self._runas_prefix} {command}"
+        return self._runas_prefix
+
+    def _get_sqlite_pragma_args(self) -> str:
+        """
+        Construct sqlite3 CLI arguments that apply self.pragmas before the query runs.
+        Output is silenced while they run, since some (e.g. mmap_size) print their value.
+
+        Returns:
+            str: sqlite3 -cmd arguments, or empty string if no pragmas are set
+        """
+        if not self.pragmas:
+            return ""
+        commands = ['.output /dev/null'] + list(self.pragmas) + ['.output']
+        return " ".join(f'-cmd "{command}"' for command in commands)
 
     def _get_adb_cmd(self, cmd: List[str]) -> List[str]:
         """
@@ -100,22 +363,152 @@ class SQLiteADBQueryTool:
         Returns:
             List[str]: Full ADB command with device serial if specified
         """
-        adb_cmd = ['adb']
-        if self.device_serial:
-            adb_cmd.extend(['-s', self.device_serial])
-        adb_cmd.extend(cmd)
-        return adb_cmd
+        return self._adb_prefix + cmd
+
+    @staticmethod
+    def _sql_heredoc(query: str) -> str:
+        """
+        Build a quoted here-document that feeds SQL to sqlite3 on stdin.
+        Nothing inside a quoted here-document is expanded by the device shell,
+        so the query needs no escaping. Must be the last thing on its command line.
+
+        Args:
+            query: SQL to send
+
+        Returns:
+            str: Here-document redirection including the query and closing delimiter
+        """
+        delimiter = f"__SQL_EOF_{uuid.uuid4().hex}__"
+        return f"<<'{delimiter}'\n{query}\n{delimiter}"
+
+    @staticmethod
+    def _transaction_script(queries: List[str]) -> str:
+        """
+        Wrap statements in one BEGIN IMMEDIATE ... COMMIT script. Each statement is
+        terminated by a ';' on its own line, so a trailing `--` comment can't swallow
+        the statements after it (or the COMMIT).
+
+        Args:
+            queries: SQL statements, with or without a trailing ';'
+
+        Returns:
+            str: Script for the sqlite3 CLI
+        """
+        statements = "".join(f"{q.strip().rstrip(';')}\n;\n" for q in queries)
+        return f"BEGIN IMMEDIATE;\n{statements}COMMIT;"
+
+    @staticmethod
+    def _parse_sqlite_error(error_msg: str) -> str:
+        """
+        Extract the message from sqlite3 CLI error output, dropping the
+        "Error:" / "Parse error near line N:" prefix.
+
+        Args:
+            error_msg: Raw error output
+
+        Returns:
+            str: Error message (unchanged if no known prefix was found)
+        """
+        match = SQLITE_ERROR_RE.search(error_msg)
+        return match.group(1).strip() if match else error_msg
+
+    def _run_shell(self, command: str, timeout: float = 10) -> subprocess.CompletedProcess:
+        """
+        Run a command on the device through the persistent adb shell session.
+
+        Args:
+            command: Shell command line
+            timeout: Seconds to wait for the command
+
+        Returns:
+            CompletedProcess with merged stdout/stderr in stdout
+        """
+        if self._shell is None:
+            self._shell = AdbShellSession(self._get_adb_cmd([]))
+        return self._shell.run(command, timeout=timeout)
+
+    def close(self):
+        """Terminate the persistent adb shell session and close the local connections."""
+        self._close_local_connection()
+        if self._shell is not None:
+            self._shell.close()
+            self._shell = None
+
+    def _get_local_connection(self, read_only: bool) -> sqlite3.Connection:
+        """
+        Get the calling thread's connection to the local database copy, opening it on first use.
+        Each thread has its own read and write connection (the web app shares one tool across
+        request threads). Read connections have PRAGMA query_only on for their whole life, so
+        reads can never modify the copy that gets pushed back. A connection opened before the
+        copy was replaced or removed is closed and reopened.
+
+        Args:
+            read_only: Get the query_only connection used for reads
+
+        Returns:
+            sqlite3.Connection with sqlite3.Row rows and self.local_pragmas applied
+        """
+        conns = getattr(self._thread_state, 'local_conns', None)
+        if conns is None:
+            conns = self._thread_state.local_conns = {}
+
+        entry = conns.get(read_only)
+        if entry is not None:
+            conn, path, generation = entry
+            if path == self.local_db_path and generation == self._local_generation:
+                return conn
+            conn.close()
+
+        # Same few statements (table_info, counts, paging) are re-run constantly.
+        # check_same_thread is off because a server may drain a streamed response on another thread
+        conn = sqlite3.connect(self.local_db_path, cached_statements=256, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Enable dict-like access
+        # journal_mode is left alone: a WAL-mode copy would keep changes out of the
+        # main file, and only the main file is pushed back to the device
+        for pragma in self.local_pragmas:
+            conn.execute(pragma)
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+        conns[read_only] = (conn, self.local_db_path, self._local_generation)
+        return conn
+
+    def _close_local_connection(self):
+        """
+        Retire the local database connections (the copy is about to be replaced or removed).
+        The calling thread's are closed now; other threads close theirs on next use, so a
+        read still streaming from one is never cut off (it keeps reading the old file).
+        """
+        with self._cache_lock:
+            self._local_generation += 1
+        conns = getattr(self._thread_state, 'local_conns', None)
+        if conns:
+            for conn, _, _ in conns.values():
+                conn.close()
+            conns.clear()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
 
-    def check_adb_connection(self) -> bool:
+    def check_adb_connection(self, refresh: bool = False) -> bool:
         """
         Check if ADB is available and device is connected.
 
+        Args:
+            refresh: Ask adb again even if an earlier check succeeded
+
         Returns:
             bool: True if ADB is working, False otherwise
         """
+        if self._adb_connected and not refresh:
+            return True
+        self._adb_connected = False
+
         try:
             result = subprocess.run(['adb', 'devices'],
-                                  capture_output=True, text=True, timeout=10)
+                                  capture_output=True, text=True, timeout=10, **SUBPROCESS_FLAGS)
             if result.returncode != 0:
                 print("❌ ADB command failed. Make sure ADB is installed and in PATH.")
                 return False
@@ -142,6 +535,7 @@ class SQLiteADBQueryTool:
                 print(f"✅ Found {len(connected_devices)} connected device(s):")
                 for device in connected_devices:
                     print(f"   {device}")
+            self._adb_connected = True
             return True
 
         except subprocess.TimeoutExpired:
@@ -151,59 +545,82 @@ class SQLiteADBQueryTool:
             print("❌ ADB not found. Make sure Android SDK is installed and ADB is in PATH.")
             return False
     
-    def check_database_exists(self) -> bool:
+    def reset_probes(self):
+        """
+        Forget all memoized device probes (connection, database location, run-as,
+        sqlite3 and command availability) so the next call checks the device again.
+        """
+        self._adb_connected = False
+        self._db_path_probed = False
+        self._resolved_db_path = None
+        self.run_as_supported = None
+        self._sqlite3_probed = False
+        self._sqlite3_path_cache = None
+        self._device_commands.clear()
+
+    def check_database_exists(self, refresh: bool = False) -> bool:
         """
         Check if the SQLite database exists on the device.
 
+        Args:
+            refresh: Re-probe the device even if the location is already cached
+
         Returns:
             bool: True if database exists, False otherwise
         """
-        try:
-            # Try multiple possible locations
-            db_locations = [
-                f"databases/{self.db_name}",
-                f"files/{self.db_name}",
-                f"files/SQLite/{self.db_name}"
-            ]
-            
-            for db_path in db_locations:
-                result = subprocess.run(self._get_adb_cmd(['shell', self._get_run_as_cmd(f'ls {db_path}')]),
-                                      capture_output=True, text=True, timeout=10)
+        db_path = self.find_database_path(refresh=refresh)
+        if db_path:
+            print(f"✅ Database found at: {db_path}")
+            return True
 
-                if result.returncode == 0 and self.db_name in result.stdout:
-                    print(f"✅ Database found at: {db_path}")
-                    return True
-            
-            print(f"❌ Database not found in any expected location")
-            return False
-                
-        except subprocess.TimeoutExpired:
-            print("❌ ADB command timed out.")
-            return False
-    
-    def find_database_path(self) -> Optional[str]:
+        print(f"❌ Database not found in any expected location")
+        return False
+
+    def _probe_database_files(self) -> None:
+        """
+        Probe all candidate database locations, plus the -wal/-shm sidecars,
+        in a single adb shell round-trip.
+
+        Populates self._resolved_db_path, self._has_wal and self._has_shm.
+        """
+        candidates = [
+            f"databases/{self.db_name}",
+            f"files/{self.db_name}",
+            f"files/SQLite/{self.db_name}"
+        ]
+        script = (
+            f'for f in {" ".join(candidates)}; do '
+            '[ -e "$f" ] && echo "OK:$f"; '
+            '[ -e "$f-wal" ] && echo "OK:$f-wal"; '
+            '[ -e "$f-shm" ] && echo "OK:$f-shm"; '
+            'done'
+        )
+        # Don't check returncode - the loop exits with the status of the last test
+        result = self._run_shell(self._get_run_as_cmd(f"sh -c '{script}'"), timeout=10)
+
+        found = {line.strip()[3:] for line in result.stdout.splitlines() if line.strip().startswith('OK:')}
+        self._resolved_db_path = next((path for path in candidates if path in found), None)
+        self._has_wal = bool(self._resolved_db_path) and f"{self._resolved_db_path}-wal" in found
+        self._has_shm = bool(self._resolved_db_path) and f"{self._resolved_db_path}-shm" in found
+
+    def find_database_path(self, refresh: bool = False) -> Optional[str]:
         """
         Find the actual path of the database on the device.
+        The result is memoized for the lifetime of the tool instance.
+
+        Args:
+            refresh: Re-probe the device even if a result is already cached
 
         Returns:
             str: Database path if found, None otherwise
         """
-        try:
-            # Try multiple possible locations
-            db_locations = [
-                f"databases/{self.db_name}",
-                f"files/{self.db_name}",
-                f"files/SQLite/{self.db_name}"
-            ]
-
-            for db_path in db_locations:
-                result = subprocess.run(self._get_adb_cmd(['shell', self._get_run_as_cmd(f'ls {db_path}')]),
-                                      capture_output=True, text=True, timeout=10)
+        if self._db_path_probed and not refresh:
+            return self._resolved_db_path
 
-                if result.returncode == 0 and self.db_name in result.stdout:
-                    return db_path
-
-            return None
+        try:
+            self._probe_database_files()
+            self._db_path_probed = True
+            return self._resolved_db_path
 
         except subprocess.TimeoutExpired:
             return None
@@ -221,25 +638,26 @@ class SQLiteADBQueryTool:
                 return 0
 
             # Try to get modification time using stat
-            result = subprocess.run(
-                self._get_adb_cmd(['shell', self._get_run_as_cmd(f'stat -c %Y {db_path}')]),
-                capture_output=True, text=True, timeout=5
-            )
+            result = self._run_shell(self._get_run_as_cmd(f'stat -c %Y {db_path}'), timeout=5)
 
             if result.returncode == 0:
                 return int(result.stdout.strip())
 
-            # Fallback: Try ls -l and parse (less reliable but works on more devices)
-            result = subprocess.run(
-                self._get_adb_cmd(['shell', self._get_run_as_cmd(f'ls -l {db_path}')]),
-                capture_output=True, text=True, timeout=5
-            )
+            # Older toolboxes without stat -c: find can usually print the timestamp
+            result = self._run_shell(self._get_run_as_cmd(f"find {db_path} -printf '%T@'"), timeout=5)
+
+            if result.returncode == 0 and result.stdout.strip():
+                return int(float(result.stdout.strip()))
+
+            # Fallback: ls -l date/time columns (less precise but works on more devices)
+            result = self._run_shell(self._get_run_as_cmd(f'ls -l {db_path}'), timeout=5)
 
             if result.returncode == 0:
-                # Parse ls output to get approximate timestamp
-                # This is not as accurate but works as a cache invalidation check
-                import hashlib
-                return int(hashlib.md5(result.stdout.encode()).hexdigest()[:8], 16)
+                match = LS_DATE_RE.match(result.stdout)
+                if match:
+                    # Not a real timestamp, but stable until the file changes - enough for cache invalidation
+                    digest = hashlib.sha1(match.group(1).encode(), usedforsecurity=False).digest()
+                    return int.from_bytes(digest[:8], 'big')
 
             return 0
 
@@ -247,21 +665,114 @@ class SQLiteADBQueryTool:
             print(f"⚠️  Could not get remote DB mtime: {e}")
             return 0
 
+    def _get_remote_change_token(self, db_path: str) -> Optional[str]:
+        """
+        Get a token that changes whenever the database contents may have changed.
+        Covers the -wal file too, since WAL-mode commits don't touch the main file.
+
+        Args:
+            db_path: Database path on device
+
+        Returns:
+            str: mtime/size of the database and its WAL, or None if stat is unavailable
+        """
+        pinned = getattr(self._thread_state, 'pinned_tokens', None)
+        if pinned is not None and db_path in pinned:
+            return pinned[db_path]
+
+        result = self._run_shell(
+            self._get_run_as_cmd(f"stat -c '%n %Y %s' {db_path} {db_path}-wal") + " 2>/dev/null", timeout=5)
+        token = result.stdout.strip()
+        # stat exits non-zero when there is no WAL, but still reports the database
+        token = token if token.startswith(db_path) else None
+        if pinned is not None:
+            pinned[db_path] = token
+        return token
+
+    @contextmanager
+    def pin_change_token(self):
+        """
+        Within the block, the calling thread stats the device database only once: the first
+        change token read is reused by get_data_version, the schema cache and the result cache
+        (e.g. one web request computing its ETag and running its queries). Writes and pushes
+        through the tool drop the pinned token.
+        """
+        previous = getattr(self._thread_state, 'pinned_tokens', None)
+        self._thread_state.pinned_tokens = {}
+        try:
+            yield
+        finally:
+            self._thread_state.pinned_tokens = previous
+
+    def _drop_pinned_tokens(self):
+        """Forget the calling thread's pinned change token (the device database is being changed)."""
+        pinned = getattr(self._thread_state, 'pinned_tokens', None)
+        if pinned:
+            pinned.clear()
+
+    def _get_device_db_version(self) -> Optional[str]:
+        """
+        Identify the current state of the device database, to tell whether the local copy
+        is still a copy of it: the change token, or the mtime where stat -c is unavailable.
+
+        Returns:
+            str: Version string, or None if it can't be determined
+        """
+        db_path = self.find_database_path()
+        if not db_path:
+            return None
+        token = self._get_remote_change_token(db_path)
+        if token:
+            return token
+        mtime = self.get_remote_db_mtime()
+        return f"mtime {mtime}" if mtime else None
+
+    def get_data_version(self) -> Optional[str]:
+        """
+        Get a token that changes whenever the data this tool would query may have changed:
+        the device database when queries run remotely, otherwise the local copy together with
+        the device database it is refreshed from. Writes made through this tool always change
+        it, even within the same second.
+
+        Returns:
+            str: Version token, or None if it can't be determined
+        """
+        if not self.force_local and self.check_run_as_support():
+            db_path = self.find_database_path()
+            token = self._get_remote_change_token(db_path) if db_path else None
+        elif self.local_db_path and os.path.exists(self.local_db_path):
+            stat = os.stat(self.local_db_path)
+            # Local queries re-pull a copy the device has moved on from (see _ensure_local_copy)
+            token = f"{self.local_db_path} {stat.st_mtime_ns} {stat.st_size} {self._get_device_db_version()}"
+        else:
+            token = None
+        return f"{self._write_generation} {token}" if token else None
+
+    def clear_result_cache(self):
+        """Drop all cached query results and table schemas (called after any write)."""
+        self._drop_pinned_tokens()
+        with self._cache_lock:
+            self._result_cache.clear()
+            self._schema_cache.clear()
+            self._write_generation += 1
+
     def load_cache_metadata(self) -> Dict[str, Any]:
         """
-        Load cache metadata from JSON file.
+        Load cache metadata from JSON file. The parsed result is kept on the instance,
+        so only the first call reads the file.
 
         Returns:
             dict: Cache metadata or empty dict if not found
         """
-        if not self.cache_metadata_file.exists():
-            return {}
+        if self._metadata_cache is not None:
+            return self._metadata_cache
 
         try:
             with open(self.cache_metadata_file, 'r') as f:
-                return json.load(f)
+                self._metadata_cache = json.load(f)
         except Exception:
             return {}
+        return self._metadata_cache
 
     def save_cache_metadata(self, metadata: Dict[str, Any]):
         """
@@ -272,7 +783,8 @@ class SQLiteADBQueryTool:
         """
         try:
             with open(self.cache_metadata_file, 'w') as f:
-                json.dump(metadata, f, indent=2)
+                f.write(json.dumps(metadata, separators=(',', ':')))
+            self._metadata_cache = metadata
         except Exception as e:
             print(f"⚠️  Could not save cache metadata: {e}")
 
@@ -315,14 +827,23 @@ class SQLiteADBQueryTool:
         Returns the path to sqlite3 if available, None otherwise.
         This method is smart and will automatically set up sqlite3 if found in system.
 
+        Returns:
+            str: Path to sqlite3 binary (relative or absolute), or None if unavailable
+        """
+        if not self._sqlite3_probed:
+            self._sqlite3_path_cache = self._find_or_install_sqlite3()
+            self._sqlite3_probed = True
+        return self._sqlite3_path_cache
+
+    def _find_or_install_sqlite3(self) -> Optional[str]:
+        """
+        Locate a working sqlite3 binary on the device, installing one if needed.
+
         Returns:
             str: Path to sqlite3 binary (relative or absolute), or None if unavailable
         """
         # First check if sqlite3 already exists in app directory
-        result = subprocess.run(
-            self._get_adb_cmd(['shell', self._get_run_as_cmd('./sqlite3 -version')]),
-            capture_output=True, text=True, timeout=5
-        )
+        result = self._run_shell(self._get_run_as_cmd('./sqlite3 -version'), timeout=5)
         output = (result.stdout + result.stderr).strip()
         if result.returncode == 0 and ('SQLite' in output or '3.' in output):
             print(f"✅ Using sqlite3 from app directory")
@@ -336,10 +857,7 @@ class SQLiteADBQueryTool:
         ]
 
         for path in system_paths:
-            result = subprocess.run(
-                self._get_adb_cmd(['shell', f'{path} -version 2>&1']),
-                capture_output=True, text=True, timeout=5
-            )
+            result = self._run_shell(f'{path} -version 2>&1', timeout=5)
             output = (result.stdout + result.stderr).strip()
             
             if result.returncode == 0 and ('SQLite' in output or '3.' in output):
@@ -347,23 +865,14 @@ class SQLiteADBQueryTool:
                 
                 # Try to copy it to app directory for proper run-as access
                 print(f"   Setting up sqlite3 in app directory...")
-                copy_result = subprocess.run(
-                    self._get_adb_cmd(['shell', self._get_run_as_cmd(f'cp {path} ./sqlite3')]),
-                    capture_output=True, text=True, timeout=10
-                )
+                copy_result = self._run_shell(self._get_run_as_cmd(f'cp {path} ./sqlite3'), timeout=10)
 
                 if copy_result.returncode == 0:
                     # Make it executable
-                    subprocess.run(
-                        self._get_adb_cmd(['shell', self._get_run_as_cmd('chmod 755 ./sqlite3')]),
-                        capture_output=True, text=True, timeout=5
-                    )
+                    self._run_shell(self._get_run_as_cmd('chmod 755 ./sqlite3'), timeout=5)
 
                     # Verify it works
-                    verify = subprocess.run(
-                        self._get_adb_cmd(['shell', self._get_run_as_cmd('./sqlite3 -version')]),
-                        capture_output=True, text=True, timeout=5
-                    )
+                    verify = self._run_shell(self._get_run_as_cmd('./sqlite3 -version'), timeout=5)
                     if verify.returncode == 0:
                         print(f"✅ sqlite3 successfully set up in app directory")
                         return './sqlite3'
@@ -380,21 +889,16 @@ class SQLiteADBQueryTool:
                 push_result = subprocess.run(
                     self._get_adb_cmd(['push', str(bundled_sqlite3), '/data/local/tmp/sqlite3']),
                     capture_output=True, text=True, timeout=30,
-                    env={**os.environ, 'MSYS_NO_PATHCONV': '1'}  # Prevent path conversion on Windows Git Bash
+                    env={**os.environ, 'MSYS_NO_PATHCONV': '1'},  # Prevent path conversion on Windows Git Bash
+                    **SUBPROCESS_FLAGS
                 )
 
                 if push_result.returncode == 0:
                     # Make it executable
-                    subprocess.run(
-                        self._get_adb_cmd(['shell', 'chmod 755 /data/local/tmp/sqlite3']),
-                        capture_output=True, text=True, timeout=5
-                    )
+                    self._run_shell('chmod 755 /data/local/tmp/sqlite3', timeout=5)
 
                     # Verify it works
-                    verify = subprocess.run(
-                        self._get_adb_cmd(['shell', '/data/local/tmp/sqlite3 -version']),
-                        capture_output=True, text=True, timeout=5
-                    )
+                    verify = self._run_shell('/data/local/tmp/sqlite3 -version', timeout=5)
                     output = (verify.stdout + verify.stderr).strip()
 
                     if verify.returncode == 0 and ('SQLite' in output or '3.' in output):
@@ -402,16 +906,10 @@ class SQLiteADBQueryTool:
 
                         # Now copy to app directory
                         print(f"   Setting up sqlite3 in app directory...")
-                        copy_result = subprocess.run(
-                            self._get_adb_cmd(['shell', self._get_run_as_cmd('cp /data/local/tmp/sqlite3 ./sqlite3')]),
-                            capture_output=True, text=True, timeout=10
-                        )
+                        copy_result = self._run_shell(self._get_run_as_cmd('cp /data/local/tmp/sqlite3 ./sqlite3'), timeout=10)
 
                         if copy_result.returncode == 0:
-                            subprocess.run(
-                                self._get_adb_cmd(['shell', self._get_run_as_cmd('chmod 755 ./sqlite3')]),
-                                capture_output=True, text=True, timeout=5
-                            )
+                            self._run_shell(self._get_run_as_cmd('chmod 755 ./sqlite3'), timeout=5)
                             print(f"✅ sqlite3 successfully set up in app directory")
                             return './sqlite3'
                         else:
@@ -433,60 +931,66 @@ class SQLiteADBQueryTool:
     def check_run_as_support(self) -> bool:
         """
         Check if run-as command works for this package (app must be debuggable).
-        Also ensures sqlite3 is available on the device.
+        Also ensures sqlite3 is available on the device. A positive result is kept for
+        the tool's lifetime; a negative one is re-checked after NEGATIVE_PROBE_TTL seconds.
 
         Returns:
             bool: True if run-as is supported and sqlite3 is available, False otherwise
         """
-        if self.run_as_supported is not None:
+        if self.run_as_supported or (self.run_as_supported is False and time.monotonic() < self._run_as_retry_at):
             return self.run_as_supported
 
+        self.run_as_supported = self._probe_run_as_support()
+        if not self.run_as_supported:
+            self._run_as_retry_at = time.monotonic() + NEGATIVE_PROBE_TTL
+        return self.run_as_supported
+
+    def _probe_run_as_support(self) -> bool:
+        """
+        Ask the device whether run-as and sqlite3 work (see check_run_as_support).
+
+        Returns:
+            bool: True if run-as is supported and sqlite3 is available, False otherwise
+        """
         try:
-            db_path = self.find_database_path()
+            # A database missing last time may have been created since
+            db_path = self.find_database_path(refresh=self._resolved_db_path is None)
             if not db_path:
-                self.run_as_supported = False
                 return False
 
             # Try a simple test command
-            result = subprocess.run(
-                self._get_adb_cmd(['shell', self._get_run_as_cmd('echo "test"')]),
-                capture_output=True, text=True, timeout=5
-            )
+            result = self._run_shell(self._get_run_as_cmd('echo "test"'), timeout=5)
 
             if result.returncode != 0:
-                if "not debuggable" in result.stderr.lower() or "unknown package" in result.stderr.lower():
+                if "not debuggable" in result.stdout.lower() or "unknown package" in result.stdout.lower():
                     print("⚠️  run-as not supported (app not debuggable). Falling back to database pull method.")
-                self.run_as_supported = False
                 return False
 
             if "test" not in result.stdout:
-                self.run_as_supported = False
                 return False
 
             # Check if sqlite3 is available
             sqlite_path = self.ensure_sqlite3_on_device()
             if not sqlite_path:
                 print("⚠️  Could not install sqlite3. Falling back to database pull method.")
-                self.run_as_supported = False
                 return False
 
             self.sqlite3_path = sqlite_path
-            self.run_as_supported = True
             return True
 
         except Exception as e:
             print(f"⚠️  Could not check run-as support: {e}")
-            self.run_as_supported = False
             return False
 
-    def execute_remote_query(self, query: str) -> Optional[List[Dict[str, Any]]]:
+    def execute_remote_query(self, query: Union[str, List[str]]) -> Optional[List[Dict[str, Any]]]:
         """
         Execute a SQL query directly on the device using run-as + sqlite3.
         This is much faster for all queries as it avoids pulling the entire database.
         Supports both read (SELECT/PRAGMA) and write (INSERT/UPDATE/DELETE) operations.
 
         Args:
-            query: SQL query to execute
+            query: SQL query to execute, or a list of write queries to run in one
+                   BEGIN IMMEDIATE ... COMMIT transaction (one fsync on the device)
 
         Returns:
             List of dictionaries containing query results, or None if error
@@ -502,28 +1006,41 @@ class SQLiteADBQueryTool:
             # Use the sqlite3 path determined during initialization
             sqlite_path = getattr(self, 'sqlite3_path', './sqlite3')
 
-            # Check if this is a write query
-            is_write = self.is_write_query(query)
-
-            # Escape the query for shell - handle both single and double quotes
-            # Replace backslashes first, then quotes
-            escaped_query = query.replace('\\', '\\\\')
-            escaped_query = escaped_query.replace('"', '\\"')
-            escaped_query = escaped_query.replace('$', '\\$')
-            escaped_query = escaped_query.replace('`', '\\`')
-            # Single quotes inside double quotes don't need escaping in most shells
+            if isinstance(query, list):
+                # Batch of writes: a single transaction instead of one implicit transaction each
+                query = self._transaction_script(query)
+                is_write = True
+            else:
+                # Check if this is a write query
+                is_write = self.is_write_query(query)
+
+            if is_write and self.autocheckpoint:
+                # Fold the WAL back into the main file in the same sqlite3 run, so later
+                # pulls don't have to transfer it (the ';' line closes any trailing comment)
+                query = f"{query}\n;\nPRAGMA wal_checkpoint(TRUNCATE);"
+
+            # Unchanged database + same read query -> same rows, no device round trip needed
+            cache_key = None
+            if not is_write:
+                token = self._get_remote_change_token(db_path)
+                if token:
+                    cache_key = (token, query)
+                    with self._cache_lock:
+                        cached = self._result_cache.get(cache_key)
+                        if cached is not None:
+                            self._result_cache.move_to_end(cache_key)
+                    if cached is not None:
+                        return list(cached)
 
             # Use JSON output mode for easier parsing (for SELECT queries)
             # For write queries, we just need to execute and check success
+            pragma_args = self._get_sqlite_pragma_args()
             if is_write:
-                sqlite_cmd = f'{sqlite_path} {db_path} "{escaped_query}"'
+                sqlite_cmd = f'{sqlite_path} {db_path} -bail {pragma_args}'
             else:
-                sqlite_cmd = f'{sqlite_path} {db_path} -json "{escaped_query}"'
+                sqlite_cmd = f'{sqlite_path} {db_path} -bail -json {pragma_args}'
 
-            result = subprocess.run(
-                self._get_adb_cmd(['shell', self._get_run_as_cmd(f'{sqlite_cmd}')]),
-                capture_output=True, text=True, timeout=60
-            )
+            result = self._run_shell(f'{self._get_run_as_cmd(sqlite_cmd)} {self._sql_heredoc(query)}', timeout=60)
 
             if result.returncode != 0:
                 error_msg = result.stderr.strip() or result.stdout.strip()
@@ -531,32 +1048,36 @@ class SQLiteADBQueryTool:
                     print("⚠️  run-as not supported. Falling back to local execution.")
                     return None
                 # Extract SQLite error message
-                if "Error:" in error_msg:
-                    self.last_error = error_msg.split("Error:")[-1].strip()
-                elif "error" in error_msg.lower():
-                    self.last_error = error_msg
-                else:
-                    self.last_error = error_msg or "Remote query execution failed"
+                self.last_error = self._parse_sqlite_error(error_msg) or "Remote query execution failed"
                 print(f"❌ Remote query failed: {self.last_error}")
                 return None
 
             # For write queries, return empty list to indicate success
             if is_write:
+                self.clear_result_cache()
                 print(f"✅ Query executed successfully on device.")
                 return []
 
             # Parse JSON output for SELECT queries
-            output = result.stdout.strip()
-            if not output:
+            # json.loads skips surrounding whitespace itself; strip() would copy the whole result
+            output = result.stdout
+            if not output or output.isspace():
                 # Empty result set
-                if query.strip().upper().startswith('SELECT') or query.strip().upper().startswith('PRAGMA'):
+                if ROW_QUERY_RE.match(query):
                     return []
                 return None
 
             try:
                 # Parse JSON array of objects
                 results = json.loads(output)
-                return results if isinstance(results, list) else []
+                results = results if isinstance(results, list) else []
+                if cache_key:
+                    with self._cache_lock:
+                        self._result_cache[cache_key] = results
+                        if len(self._result_cache) > RESULT_CACHE_SIZE:
+                            self._result_cache.popitem(last=False)
+                    return list(results)
+                return results
             except json.JSONDecodeError:
                 # Fallback: Try to parse as non-JSON output
                 print("⚠️  Could not parse JSON output, trying non-JSON mode...")
@@ -571,6 +1092,139 @@ class SQLiteADBQueryTool:
             print(f"❌ {self.last_error}")
             return None
 
+    @staticmethod
+    def _enlarge_pipe(pipe):
+        """
+        Grow a pipe's kernel buffer to PIPE_BUFFER_SIZE (Linux only), so bulk
+        output is read in fewer, larger chunks. Best effort.
+
+        Args:
+            pipe: Pipe file object (e.g. proc.stdout)
+        """
+        if fcntl is None or not sys.platform.startswith('linux'):
+            return
+        try:
+            fcntl.fcntl(pipe.fileno(), F_SETPIPE_SZ, PIPE_BUFFER_SIZE)
+        except OSError:
+            pass  # Above /proc/sys/fs/pipe-max-size - keep the default
+
+    def _open_remote_query_stream(self, query: str, mode_args: str) -> subprocess.Popen:
+        """
+        Start sqlite3 on the device with its output on a raw `adb exec-out` pipe.
+        exec-out doesn't report the remote exit status, so stderr is merged into
+        the stream and the status is appended as a final marker line.
+
+        Args:
+            query: SQL query to execute
+            mode_args: sqlite3 output mode arguments (e.g. '-json')
+
+        Returns:
+            The running adb process
+        """
+        db_path = self.find_database_path()
+        if not db_path:
+            self.last_error = "Could not find database path on device"
+            raise RuntimeError(self.last_error)
+
+        sqlite_path = getattr(self, 'sqlite3_path', './sqlite3')
+        sqlite_cmd = self._get_run_as_cmd(
+            f'{sqlite_path} {db_path} -bail {mode_args} {self._get_sqlite_pragma_args()}'
+        )
+        proc = subprocess.Popen(
+            self._get_adb_cmd(['exec-out', f'{sqlite_cmd} 2>&1 {self._sql_heredoc(query)}\n'
+                                           f'echo "{STREAM_STATUS_MARKER}$?"']),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=PIPE_BUFFER_SIZE, **SUBPROCESS_FLAGS
+        )
+        self._enlarge_pipe(proc.stdout)
+        return proc
+
+    def _raise_stream_error(self, rc: int, error_text: bytes):
+        """Record a failed streamed query in last_error and raise."""
+        error_msg = error_text.decode('utf-8', errors='replace').strip()
+        self.last_error = self._parse_sqlite_error(error_msg) or f"Remote query failed (exit status {rc})"
+        raise RuntimeError(self.last_error)
+
+    @staticmethod
+    def _close_stream(proc: subprocess.Popen):
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+
+    def iter_remote_query(self, query: str) -> Iterator[Dict[str, Any]]:
+        """
+        Execute a read query on the device and yield result rows as they arrive.
+        sqlite3's -json output puts one row per line, so rows are decoded line by
+        line and large result sets are never held in memory as a whole.
+
+        Args:
+            query: SQL query to execute
+
+        Yields:
+            Dictionaries containing result rows
+
+        Raises:
+            RuntimeError: If the query fails on the device (message is also stored in last_error)
+        """
+        self.last_error = None  # Clear previous error
+        proc = self._open_remote_query_stream(query, '-json')
+        rc = 0
+        error_text = b''
+        try:
+            for line in proc.stdout:
+                if line.startswith(STREAM_STATUS_MARKER_BYTES):
+                    rc = int(line[len(STREAM_STATUS_MARKER_BYTES):].strip() or 0)
+                    continue
+                row = line.strip().lstrip(b'[').rstrip(b',]')
+                if not row:
+                    continue
+                try:
+                    yield json.loads(row)
+                except json.JSONDecodeError:
+                    error_text += line
+        finally:
+            self._close_stream(proc)
+
+        if rc != 0 or error_text:
+            self._raise_stream_error(rc, error_text)
+
+    def iter_remote_query_text(self, query: str) -> Iterator[List[str]]:
+        """
+        Execute a read query on the device and yield rows as lists of strings.
+        Uses sqlite3's -ascii mode (0x1F between fields, 0x1E between records),
+        which needs no quoting or escaping and is far cheaper to produce and split
+        than JSON. Column types are not preserved and NULL becomes ''.
+
+        Args:
+            query: SQL query to execute
+
+        Yields:
+            Lists of column values as strings
+
+        Raises:
+            RuntimeError: If the query fails on the device (message is also stored in last_error)
+        """
+        self.last_error = None  # Clear previous error
+        proc = self._open_remote_query_stream(query, '-ascii')
+        pending = b''
+        try:
+            while True:
+                chunk = proc.stdout.read(65536)
+                if not chunk:
+                    break
+                records = (pending + chunk).split(b'\x1e')
+                pending = records.pop()
+                for record in records:
+                    yield record.decode('utf-8', errors='replace').split('\x1f')
+        finally:
+            self._close_stream(proc)
+
+        # Whatever follows the last record separator is error output and the status marker
+        error_text, _, status = pending.rpartition(STREAM_STATUS_MARKER_BYTES)
+        rc = int(status.strip() or 0)
+        if rc != 0 or error_text.strip():
+            self._raise_stream_error(rc, error_text)
+
     def _execute_remote_query_fallback(self, query: str, db_path: str) -> Optional[List[Dict[str, Any]]]:
         """
         Fallback method for remote query execution when JSON mode is not available.
@@ -587,19 +1241,10 @@ class SQLiteADBQueryTool:
             # Use the sqlite3 path determined during initialization
             sqlite_path = getattr(self, 'sqlite3_path', './sqlite3')
 
-            # Escape the query for shell - handle special characters
-            escaped_query = query.replace('\\', '\\\\')
-            escaped_query = escaped_query.replace('"', '\\"')
-            escaped_query = escaped_query.replace('$', '\\$')
-            escaped_query = escaped_query.replace('`', '\\`')
-
             # Use -header and -separator modes
-            sqlite_cmd = f'{sqlite_path} {db_path} -header -separator "|" "{escaped_query}"'
+            sqlite_cmd = f'{sqlite_path} {db_path} -bail -header -separator "|" {self._get_sqlite_pragma_args()}'
 
-            result = subprocess.run(
-                self._get_adb_cmd(['shell', self._get_run_as_cmd(f'{sqlite_cmd}')]),
-                capture_output=True, text=True, timeout=60
-            )
+            result = self._run_shell(f'{self._get_run_as_cmd(sqlite_cmd)} {self._sql_heredoc(query)}', timeout=60)
 
             if result.returncode != 0:
                 return None
@@ -637,30 +1282,39 @@ class SQLiteADBQueryTool:
         Returns:
             bool: True if write query, False otherwise
         """
-        query_upper = query.strip().upper()
-        write_operations = ['INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 'ALTER', 'REPLACE']
-        return any(query_upper.startswith(op) for op in write_operations)
+        # Only the leading keyword is uppercased - bulk INSERTs can be megabytes long
+        match = FIRST_KEYWORD_RE.match(query)
+        return bool(match) and match.group(1).upper() in WRITE_OPERATIONS
 
-    def pull_database(self, use_compression: bool = True) -> bool:
+    def pull_database(self, use_compression: bool = True, force: bool = False) -> bool:
         """
         Pull the database from device to local file, with optional caching and compression.
 
         Args:
-            use_compression: Use gzip compression during transfer (default: True)
+            use_compression: Use gzip compression during transfer (default: True). With
+                adb_compression set, adb compresses the transfer instead.
+            force: Pull even if the cached copy's recorded mtime still matches the device
+                (mtimes have one-second resolution)
 
         Returns:
             bool: True if successful, False otherwise
         """
         try:
+            # The local copy is about to be replaced - don't keep reading the old one
+            self._close_local_connection()
+            with self._cache_lock:
+                self._schema_cache.clear()
+
             # Check for cached database first
-            cached_path = self.get_cached_db_path()
+            cached_path = None if force else self.get_cached_db_path()
             if cached_path:
                 self.local_db_path = cached_path
                 self.device_db_path = self.find_database_path()  # Store for push operation
+                self._pulled_version = self._get_device_db_version()
                 return True
 
-            # Find the database path
-            db_path = self.find_database_path()
+            # Find the database path (re-probe so the WAL/SHM state is current)
+            db_path = self.find_database_path(refresh=True)
             if not db_path:
                 print("❌ Could not find database on device")
                 return False
@@ -682,22 +1336,60 @@ class SQLiteADBQueryTool:
             print(f"   Source: {db_path}")
             print(f"   Destination: {self.local_db_path}")
 
-            # Determine transfer method
-            if use_compression:
-                # Option 4: Use compressed transfer
-                success = self._pull_database_compressed(db_path)
+            if self._has_wal:
+                self._checkpoint_remote_wal(db_path)
+            # Taken before the transfer: a change while it runs makes the copy count as stale
+            device_version = self._get_device_db_version()
+
+            # Transfer into a staging file that is renamed over the copy once complete. The copy
+            # is never rewritten in place: other connections may have it open (and memory-mapped)
+            staging_path = f"{self.local_db_path}.{uuid.uuid4().hex}.part"
+
+            # Transfer the database and its WAL/SHM files concurrently - they are
+            # independent streams over the same adb transport
+            # adb-level compression replaces the device-side gzip/zstd pipe - compressing twice only costs CPU
+            if use_compression and not self.adb_compression:
+                pull_main = self._pull_database_compressed
             else:
-                # Standard transfer
-                success = self._pull_database_standard(db_path)
+                pull_main = self._pull_database_standard
+            try:
+                self._pulled_sha256 = None
+                with ThreadPoolExecutor(max_workers=4) as executor:
+                    # The device hashes its copy while the bytes are in flight
+                    checksum_future = executor.submit(self._get_remote_sha256, db_path) if self.verify_pulls else None
+                    main_future = executor.submit(pull_main, db_path, staging_path)
+                    side_futures = [executor.submit(self._pull_side_file, db_path, suffix, staging_path)
+                                    for suffix in self._side_file_suffixes()]
+                    success = main_future.result()
+                    for future in side_futures:
+                        future.result()
+                    remote_sha256 = checksum_future.result() if checksum_future else None
+
+                if success and remote_sha256:
+                    # Compressed pulls were hashed as they were written; other transfers are read back
+                    local_sha256 = self._pulled_sha256 or self._file_sha256(staging_path)
+                    if local_sha256 != remote_sha256:
+                        # Most likely the app wrote to the database during the transfer
+                        print("⚠️  Checksum mismatch between device and local copy - the database may be changing on the device")
+
+                if success:
+                    # Side files left over from an earlier pull must not be replayed against the new copy
+                    for suffix in ('-wal', '-shm'):
+                        if os.path.exists(staging_path + suffix):
+                            os.replace(staging_path + suffix, self.local_db_path + suffix)
+                        elif os.path.exists(self.local_db_path + suffix):
+                            os.unlink(self.local_db_path + suffix)
+                    os.replace(staging_path, self.local_db_path)
+                    self._pulled_version = device_version
+            finally:
+                for path in (staging_path, staging_path + '-wal', staging_path + '-shm'):
+                    if os.path.exists(path):
+                        os.unlink(path)
 
             if success:
-                # Also pull WAL and SHM files if they exist (for uncommitted transactions)
-                self._pull_wal_files(db_path)
-
                 # Save cache metadata
                 if self.use_cache:
                     remote_mtime = self.get_remote_db_mtime()
-                    from datetime import datetime
                     metadata = {
                         'mtime': remote_mtime,
                         'cached_at': datetime.now().isoformat(),
@@ -716,149 +1408,481 @@ class SQLiteADBQueryTool:
             print(f"❌ Error pulling database: {e}")
             return False
 
-    def _pull_wal_files(self, db_path: str) -> None:
+    def _get_remote_sha256(self, remote_path: str) -> Optional[str]:
+        """
+        Get the SHA-256 of a file in the app's data directory using the device's sha256sum.
+        Runs as its own `adb exec-out` so it doesn't hold the shared shell session during a pull.
+
+        Args:
+            remote_path: Path on device, relative to the app's data directory
+
+        Returns:
+            str: Lowercase hex digest, or None if sha256sum is unavailable or failed
+        """
+        try:
+            result = subprocess.run(
+                self._get_adb_cmd(['exec-out', self._get_run_as_cmd(f'sha256sum {remote_path}')]),
+                capture_output=True, text=True, timeout=120, **SUBPROCESS_FLAGS)
+        except subprocess.TimeoutExpired:
+            return None
+        fields = result.stdout.split()
+        if result.returncode != 0 or not fields or not SHA256_HEX_RE.fullmatch(fields[0]):
+            return None
+        return fields[0].lower()
+
+    @staticmethod
+    def _file_sha256(path: str) -> str:
         """
-        Pull WAL and SHM files if they exist (for uncommitted transactions).
-        This ensures we get all data including uncommitted changes.
+        SHA-256 of a local file, read through one reused buffer (the freshly pulled
+        file is still in the page cache, so this is bound by the hash itself).
+
+        Args:
+            path: Local file path
+
+        Returns:
+            str: Lowercase hex digest
+        """
+        digest = hashlib.sha256()
+        view = memoryview(bytearray(PIPE_BUFFER_SIZE))
+        with open(path, 'rb', buffering=0) as f:
+            while True:
+                n = f.readinto(view)
+                if not n:
+                    break
+                digest.update(view[:n])
+        return digest.hexdigest()
+
+    def _side_file_suffixes(self) -> List[str]:
+        """
+        WAL/SHM files to pull alongside the database (uncommitted transactions live there).
+        Presence was learned by the location probe in find_database_path.
+
+        Returns:
+            List of file suffixes present on device
+        """
+        if not self._has_wal:
+            return []
+        return ['-wal', '-shm'] if self._has_shm else ['-wal']
+
+    def _checkpoint_remote_wal(self, db_path: str) -> None:
+        """
+        Best-effort passive checkpoint before pulling, so most committed pages are in the
+        main file and the DB/WAL/SHM copies line up. Skipped if run-as + sqlite3 hasn't
+        been verified on this instance.
 
         Args:
             db_path: Database path on device
         """
+        sqlite_path = getattr(self, 'sqlite3_path', None)
+        if not sqlite_path:
+            return
         try:
-            wal_path = f"{db_path}-wal"
-            shm_path = f"{db_path}-shm"
+            self._run_shell(self._get_run_as_cmd(
+                f'{sqlite_path} {db_path} "PRAGMA wal_checkpoint(PASSIVE);"'), timeout=30)
+        except subprocess.TimeoutExpired:
+            pass
 
-            # Check if WAL file exists
-            check_wal = subprocess.run(
-                self._get_adb_cmd(['shell', self._get_run_as_cmd(f'ls {wal_path}')]),
-                capture_output=True, text=True, timeout=5
-            )
+    def _pull_side_file(self, db_path: str, suffix: str, local_db_path: str) -> None:
+        """
+        Pull a WAL or SHM file next to a local database file.
 
-            if check_wal.returncode == 0 and '-wal' in check_wal.stdout:
-                print(f"   Found WAL file, pulling to include uncommitted data...")
-                local_wal_path = f"{self.local_db_path}-wal"
+        Args:
+            db_path: Database path on device
+            suffix: '-wal' or '-shm'
+            local_db_path: Local database file the side file belongs to
+        """
+        name = suffix.lstrip('-').upper()
+        try:
+            local_path = f"{local_db_path}{suffix}"
+            if self._pull_remote_file(f"{db_path}{suffix}", local_path, timeout=60):
+                print(f"   ✅ {name} file pulled ({os.path.getsize(local_path):,} bytes)")
+        except Exception as e:
+            print(f"   ⚠️  Could not pull {name} file (non-critical): {e}")
 
-                # Pull WAL file
-                result = subprocess.run(
-                    self._get_adb_cmd(['exec-out', self._get_run_as_cmd(f'cat {wal_path}')]),
-                    capture_output=True, timeout=60
-                )
+    def _pull_remote_file(self, remote_path: str, local_path: str, timeout: int) -> bool:
+        """
+        Copy a file from the app's data directory to the host.
 
-                if result.returncode == 0:
-                    with open(local_wal_path, 'wb') as f:
-                        f.write(result.stdout)
-                    wal_size = os.path.getsize(local_wal_path)
-                    print(f"   ✅ WAL file pulled ({wal_size:,} bytes)")
-
-                # Pull SHM file if exists
-                check_shm = subprocess.run(
-                    self._get_adb_cmd(['shell', self._get_run_as_cmd(f'ls {shm_path}')]),
-                    capture_output=True, text=True, timeout=5
-                )
+        The file is staged in /data/local/tmp and fetched with `adb pull`, which uses the
+        adb sync protocol and is considerably faster than piping bytes through a shell.
+        With adb_compression set the transfer is compressed by adb (`pull -z`); an adb too
+        old for that is retried uncompressed, and compression is turned off for the tool.
+        Falls back to `exec-out cat` if staging fails (e.g. /data/local/tmp not writable).
 
-                if check_shm.returncode == 0 and '-shm' in check_shm.stdout:
-                    local_shm_path = f"{self.local_db_path}-shm"
-                    result = subprocess.run(
-                        self._get_adb_cmd(['exec-out', self._get_run_as_cmd(f'cat {shm_path}')]),
-                        capture_output=True, timeout=60
-                    )
+        Args:
+            remote_path: Path on device, relative to the app's data directory
+            local_path: Local destination path
+            timeout: Seconds to wait for the transfer
 
+        Returns:
+            bool: True if successful
+        """
+        staging_path = f"/data/local/tmp/sqlite_devtools_{uuid.uuid4().hex}"
+        try:
+            # The redirect runs in the shell user's context, which can write to /data/local/tmp.
+            # Its own exec-out, not the shared shell session, so parallel pulls don't queue.
+            staged = subprocess.run(
+                self._get_adb_cmd(['exec-out', f"{self._get_run_as_cmd(f'cat {remote_path}')} > {staging_path}; "
+                                               f'echo "{STREAM_STATUS_MARKER}$?"']),
+                capture_output=True, text=True, timeout=timeout, **SUBPROCESS_FLAGS)
+            if f"{STREAM_STATUS_MARKER}0" in staged.stdout:
+                compression = self.adb_compression
+                pull_flags = ['-z', compression] if compression else []
+                result = subprocess.run(
+                    self._get_adb_cmd(['pull', *pull_flags, staging_path, local_path]),
+                    capture_output=True, text=True, timeout=timeout, **SUBPROCESS_FLAGS)
+                if result.returncode != 0 and compression:
+                    result = subprocess.run(
+                        self._get_adb_cmd(['pull', staging_path, local_path]),
+                        capture_output=True, text=True, timeout=timeout, **SUBPROCESS_FLAGS)
                     if result.returncode == 0:
-                        with open(local_shm_path, 'wb') as f:
-                            f.write(result.stdout)
-                        print(f"   ✅ SHM file pulled")
+                        print(f"   ⚠️  adb pull -z {compression} not supported, transferring uncompressed")
+                        self.adb_compression = None
+                if result.returncode == 0:
+                    return True
+        except subprocess.TimeoutExpired:
+            pass
+        finally:
+            try:
+                subprocess.run(self._get_adb_cmd(['exec-out', f"rm -f {staging_path}"]),
+                               capture_output=True, timeout=10, **SUBPROCESS_FLAGS)
+            except subprocess.TimeoutExpired:
+                pass
 
-        except Exception as e:
-            print(f"   ⚠️  Could not pull WAL files (non-critical): {e}")
+        return self._pull_remote_file_direct(remote_path, local_path, timeout)
+
+    def _get_remote_file_size(self, remote_path: str) -> Optional[int]:
+        """
+        Get the size of a file in the app's data directory.
+
+        Args:
+            remote_path: Path on device, relative to the app's data directory
+
+        Returns:
+            int: Size in bytes, or None if it can't be determined
+        """
+        result = self._run_shell(self._get_run_as_cmd(f'stat -c %s {remote_path}'), timeout=5)
+        if result.returncode != 0:
+            return None
+        try:
+            return int(result.stdout.strip())
+        except ValueError:
+            return None
+
+    def _pull_remote_file_direct(self, remote_path: str, local_path: str, timeout: int) -> bool:
+        """
+        Copy a file from the app's data directory over `exec-out`, without staging.
+        When the size is known (and os.pwrite exists - not on Windows), the destination is
+        pre-sized and the bytes are written at their offsets, then the length is verified.
+        A -wal/-shm file that changed size meanwhile is kept as read; the database itself is
+        re-stat'ed and read once more, and the pull fails if its length still doesn't match.
+
+        Args:
+            remote_path: Path on device, relative to the app's data directory
+            local_path: Local destination path
+            timeout: Seconds to wait for the transfer
+
+        Returns:
+            bool: True if successful
+        """
+        cat_cmd = self._get_run_as_cmd(f'cat {remote_path}')
+        size = self._get_remote_file_size(remote_path) if hasattr(os, 'pwrite') else None
+        if size is None:
+            return self._exec_out_to_file(cat_cmd, local_path, timeout)
+
+        written = self._pull_sized(remote_path, cat_cmd, local_path, size, timeout)
+        if written != size and not remote_path.endswith(('-wal', '-shm')) and written >= 0:
+            print(f"   ⚠️  {remote_path} changed size during the pull, retrying")
+            size = self._get_remote_file_size(remote_path)
+            written = self._pull_sized(remote_path, cat_cmd, local_path, size, timeout) if size is not None else -1
+            if written != size:
+                written = -1
+
+        if written < 0:
+            os.unlink(local_path)
+            return False
+        return True
+
+    def _pull_sized(self, remote_path: str, cat_cmd: str, local_path: str, size: int, timeout: int) -> int:
+        """
+        Read a file of known size into a pre-sized destination: in parallel ranges when it is
+        large, otherwise (or if the ranges fail) as one stream. A short or long read leaves the
+        destination truncated to what was actually read.
+
+        Args:
+            remote_path: Path on device, relative to the app's data directory
+            cat_cmd: run-as command that prints the file
+            local_path: Local destination path
+            size: Expected size in bytes
+            timeout: Seconds to wait for the transfer
+
+        Returns:
+            int: Number of bytes written, or -1 if the read failed
+        """
+        fd = os.open(local_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            written = -1
+            if size > RANGE_PULL_CHUNK_SIZE:
+                written = self._pull_ranges(remote_path, fd, size, timeout)
+            if written != size:
+                written = self._exec_out_to_offset(cat_cmd, fd, 0, timeout)
+            if written != size:
+                os.ftruncate(fd, max(written, 0))
+        finally:
+            os.close(fd)
+        return written
+
+    def _pull_ranges(self, remote_path: str, fd: int, size: int, timeout: int) -> int:
+        """
+        Pull a large file as RANGE_PULL_CHUNK_SIZE pieces read concurrently with `dd`,
+        each written straight to its offset in the pre-sized destination.
+
+        Args:
+            remote_path: Path on device, relative to the app's data directory
+            fd: Open file descriptor of the pre-sized destination
+            size: File size in bytes
+            timeout: Seconds to wait for each piece
+
+        Returns:
+            int: Total bytes written, or -1 if any piece failed or came back short
+        """
+        block = 1 << 20
+        blocks_per_chunk = RANGE_PULL_CHUNK_SIZE // block
+        offsets = range(0, size, RANGE_PULL_CHUNK_SIZE)
+        print(f"   Pulling in {len(offsets)} parallel ranges...")
+
+        def pull_range(offset: int) -> bool:
+            expected = min(RANGE_PULL_CHUNK_SIZE, size - offset)
+            dd_cmd = self._get_run_as_cmd(
+                f'dd if={remote_path} bs={block} skip={offset // block} count={blocks_per_chunk} 2>/dev/null')
+            return self._exec_out_to_offset(dd_cmd, fd, offset, timeout) == expected
+
+        with ThreadPoolExecutor(max_workers=RANGE_PULL_WORKERS) as executor:
+            if not all(executor.map(pull_range, offsets)):
+                print(f"   ⚠️  Range pull incomplete, retrying as a single stream")
+                return -1
+        return size
+
+    def _exec_out_to_offset(self, command: str, fd: int, offset: int, timeout: int) -> int:
+        """
+        Run a command through `adb exec-out` and write its stdout into a file
+        descriptor starting at the given offset, through one reused buffer.
+
+        Args:
+            command: Shell command to run on the device
+            fd: Open file descriptor to write to
+            offset: File offset for the first byte
+            timeout: Seconds to wait for the transfer
+
+        Returns:
+            int: Number of bytes written, or -1 if the command failed or timed out
+        """
+        proc = subprocess.Popen(self._get_adb_cmd(['exec-out', command]),
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0, **SUBPROCESS_FLAGS)
+        self._enlarge_pipe(proc.stdout)
+        timer = threading.Timer(timeout, proc.kill)
+        timer.start()
+
+        try:
+            written = self._stream_copy(proc.stdout, fd, offset)
+            stderr = proc.stderr.read()
+            proc.wait()
+        finally:
+            timer.cancel()
+            proc.stdout.close()
+            proc.stderr.close()
+
+        if proc.returncode != 0:
+            print(f"   ⚠️  Transfer failed: {stderr.decode('utf-8', errors='replace').strip() or 'timed out'}")
+            return -1
+        return written
+
+    @staticmethod
+    def _stream_copy(src, fd: int, offset: Optional[int] = None, digest=None) -> int:
+        """
+        Copy a binary stream into a file descriptor through one reused buffer
+        (readinto + memoryview slices, no bytes object per chunk).
+
+        Args:
+            src: Readable binary stream supporting readinto
+            fd: Open file descriptor to write to
+            offset: Write at this file offset with os.pwrite; None writes at the current position
+            digest: Optional hashlib object updated with every chunk copied
+
+        Returns:
+            int: Number of bytes written
+        """
+        view = memoryview(bytearray(PIPE_BUFFER_SIZE))
+        written = 0
+        while True:
+            n = src.readinto(view)
+            if not n:
+                break
+            chunk = view[:n]
+            if digest is not None:
+                digest.update(chunk)
+            while chunk:
+                if offset is None:
+                    done = os.write(fd, chunk)
+                else:
+                    done = os.pwrite(fd, chunk, offset + written)
+                chunk = chunk[done:]
+                written += done
+        return written
+
+    def _exec_out_to_file(self, command: str, local_path: str, timeout: int) -> bool:
+        """
+        Run a command through `adb exec-out` with its stdout going straight to a file,
+        so the bytes never pass through Python memory.
+
+        Args:
+            command: Shell command to run on the device
+            local_path: Local file to write the output to
+            timeout: Seconds to wait for the transfer
+
+        Returns:
+            bool: True if the command succeeded (a partial file is removed on failure)
+        """
+        with open(local_path, 'wb') as f:
+            proc = subprocess.Popen(self._get_adb_cmd(['exec-out', command]),
+                                    stdout=f, stderr=subprocess.PIPE, **SUBPROCESS_FLAGS)
+            try:
+                _, stderr = proc.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.communicate()
+                raise
+
+        if proc.returncode != 0:
+            print(f"   ⚠️  Transfer failed: {stderr.decode('utf-8', errors='replace').strip()}")
+            os.unlink(local_path)
+            return False
+        return True
 
-    def _pull_database_standard(self, db_path: str) -> bool:
+    def _pull_database_standard(self, db_path: str, local_path: str) -> bool:
         """
         Pull database using standard cat method (no compression).
 
         Args:
             db_path: Database path on device
+            local_path: Local destination path
 
         Returns:
             bool: True if successful
         """
         try:
-            print(f"   Transfer method: Standard (uncompressed)")
-            result = subprocess.run(
-                self._get_adb_cmd(['exec-out', self._get_run_as_cmd(f'cat {db_path}')]),
-                capture_output=True, timeout=300)
-
-            if result.returncode == 0:
-                with open(self.local_db_path, 'wb') as f:
-                    f.write(result.stdout)
-                return True
+            if self.adb_compression:
+                print(f"   Transfer method: adb pull (adb {self.adb_compression} compression)")
             else:
-                print(f"❌ Failed to pull database: {result.stderr}")
-                return False
+                print(f"   Transfer method: Standard (uncompressed)")
+            if self._pull_remote_file(db_path, local_path, timeout=300):
+                return True
+            print(f"❌ Failed to pull database")
+            return False
 
         except subprocess.TimeoutExpired:
             print("❌ Transfer timed out")
             return False
 
-    def _pull_database_compressed(self, db_path: str) -> bool:
+    def _device_has_command(self, name: str) -> bool:
+        """
+        Check whether a command is available on the device. Probed once per instance.
+
+        Args:
+            name: Command name
+
+        Returns:
+            bool: True if the command is on the device's PATH
+        """
+        if name not in self._device_commands:
+            check = self._run_shell(f'which {name}', timeout=5)
+            self._device_commands[name] = check.returncode == 0 and bool(check.stdout.strip())
+        return self._device_commands[name]
+
+    def device_has_gzip(self) -> bool:
+        """
+        Check whether gzip is available on the device.
+
+        Returns:
+            bool: True if gzip is available
+        """
+        return self._device_has_command('gzip')
+
+    def device_has_zstd(self) -> bool:
+        """
+        Check whether zstd is available on the device.
+
+        Returns:
+            bool: True if zstd is available
+        """
+        return self._device_has_command('zstd')
+
+    def _pull_database_compressed(self, db_path: str, local_path: str) -> bool:
         """
-        Pull database using gzip compression for faster transfer.
+        Pull database using compression for faster transfer.
+        Uses zstd when both the device and the host (zstandard module) support it,
+        otherwise gzip.
 
         Args:
             db_path: Database path on device
+            local_path: Local destination path
 
         Returns:
             bool: True if successful
         """
         try:
-            # Check if gzip is available on device
-            check_gzip = subprocess.run(
-                self._get_adb_cmd(['shell', 'which gzip']),
-                capture_output=True, text=True, timeout=5
-            )
-
-            if check_gzip.returncode != 0 or not check_gzip.stdout.strip():
+            # Fastest levels: DB pages compress well even at -1, and the device CPU
+            # shouldn't become the bottleneck
+            if zstandard is not None and self.device_has_zstd():
+                encoder, compress_cmd = 'zstd', f'zstd -1 -T0 -q -c {db_path}'
+            elif self.device_has_gzip():
+                encoder, compress_cmd = 'gzip', f'gzip -1 -c {db_path}'
+            else:
                 print(f"   Transfer method: Standard (gzip not available on device)")
-                return self._pull_database_standard(db_path)
+                return self._pull_database_standard(db_path, local_path)
 
-            print(f"   Transfer method: Compressed (gzip)")
-            import time
+            print(f"   Transfer method: Compressed ({encoder})")
             start_time = time.time()
 
-            # Pull compressed data
-            result = subprocess.run(
-                self._get_adb_cmd(['exec-out', self._get_run_as_cmd(f'gzip -c {db_path}')]),
-                capture_output=True, timeout=300)
-
-            if result.returncode != 0:
+            # Decompressed as it arrives: no temp file, no full copy in memory
+            proc = subprocess.Popen(
+                self._get_adb_cmd(['exec-out', self._get_run_as_cmd(compress_cmd)]),
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=PIPE_BUFFER_SIZE, **SUBPROCESS_FLAGS)
+            self._enlarge_pipe(proc.stdout)
+            timer = threading.Timer(300, proc.kill)
+            timer.start()
+            try:
+                if encoder == 'zstd':
+                    reader = zstandard.ZstdDecompressor().stream_reader(proc.stdout, read_size=PIPE_BUFFER_SIZE)
+                elif igzip is not None:
+                    reader = igzip.IGzipFile(fileobj=proc.stdout, mode='rb')
+                else:
+                    reader = gzip.GzipFile(fileobj=proc.stdout, mode='rb')
+                digest = hashlib.sha256() if self.verify_pulls else None
+                with reader, open(local_path, 'wb') as out:
+                    self._stream_copy(reader, out.fileno(), digest=digest)
+                proc.wait()
+            except DECOMPRESSION_ERRORS as e:
+                proc.kill()
+                proc.wait()
+                if not timer.is_alive():
+                    raise subprocess.TimeoutExpired(proc.args, 300)
+                print(f"⚠️  Compressed transfer failed ({e}), falling back to standard transfer")
+                return self._pull_database_standard(db_path, local_path)
+            finally:
+                timer.cancel()
+                proc.stdout.close()
+                proc.stderr.close()
+
+            if proc.returncode != 0:
                 print(f"⚠️  Compression failed, falling back to standard transfer")
-                return self._pull_database_standard(db_path)
+                return self._pull_database_standard(db_path, local_path)
 
-            # Write compressed data to temp file
-            compressed_path = self.local_db_path + '.gz'
-            with open(compressed_path, 'wb') as f:
-                f.write(result.stdout)
-
-            compressed_size = os.path.getsize(compressed_path)
+            if digest is not None:
+                self._pulled_sha256 = digest.hexdigest()
             transfer_time = time.time() - start_time
-
-            # Decompress
-            print(f"   Decompressing ({compressed_size:,} bytes transferred in {transfer_time:.1f}s)...")
-            try:
-                import gzip
-                with gzip.open(compressed_path, 'rb') as f_in, open(self.local_db_path, 'wb') as f_out:
-                    f_out.write(f_in.read())
-                os.unlink(compressed_path) # Clean up compressed file
-            except Exception as e:
-                print(f"❌ Decompression failed: {e}")
-                if os.path.exists(compressed_path):
-                    os.unlink(compressed_path)
-                return False
-
-            # gzip -d removes the .gz extension automatically
-            if not os.path.exists(self.local_db_path):
-                print(f"❌ Decompressed file not found")
-                return False
-
+            print(f"   Transferred and decompressed in {transfer_time:.1f}s")
             return True
 
         except subprocess.TimeoutExpired:
@@ -866,7 +1890,7 @@ class SQLiteADBQueryTool:
             return False
         except Exception as e:
             print(f"⚠️  Compression error: {e}, falling back to standard transfer")
-            return self._pull_database_standard(db_path)
+            return self._pull_database_standard(db_path, local_path)
     
     def push_database(self) -> bool:
         """
@@ -884,6 +1908,14 @@ class SQLiteADBQueryTool:
             return False
         
         try:
+            # Pushing a copy of an older state would erase whatever the app wrote since the pull
+            self._drop_pinned_tokens()
+            device_version = self._get_device_db_version()
+            if device_version is not None and device_version != self._pulled_version:
+                self.last_error = "Database changed on the device since it was pulled - not overwriting it. Run the query again."
+                print(f"❌ {self.last_error}")
+                return False
+
             print(f"📤 Pushing database back to device...")
             print(f"   Source: {self.local_db_path}")
             print(f"   Destination: {self.device_db_path}")
@@ -894,25 +1926,26 @@ class SQLiteADBQueryTool:
             # Push to temp location
             result = subprocess.run(
                 self._get_adb_cmd(['push', self.local_db_path, temp_path]),
-                capture_output=True, text=True, timeout=60)
+                capture_output=True, text=True, timeout=60, **SUBPROCESS_FLAGS)
 
             if result.returncode != 0:
                 print(f"❌ Failed to push to temp location: {result.stderr}")
                 return False
 
-            # Copy from temp to app's private directory with proper permissions
-            result = subprocess.run(
-                self._get_adb_cmd(['shell', self._get_run_as_cmd(f'cp {temp_path} {self.device_db_path}')]),
-                capture_output=True, text=True, timeout=60)
+            # Copy from temp to app's private directory with proper permissions, then clean
+            # up the temp file whatever happened - one round-trip, cp's status is kept
+            result = self._run_shell(
+                f'{self._get_run_as_cmd(f"cp {temp_path} {self.device_db_path}")}; '
+                f'cp_status=$?; rm -f {temp_path}; [ $cp_status -eq 0 ]',
+                timeout=60)
 
             if result.returncode != 0:
-                print(f"❌ Failed to copy to app directory: {result.stderr}")
-                # Clean up temp file
-                subprocess.run(self._get_adb_cmd(['shell', f'rm {temp_path}']), capture_output=True)
+                print(f"❌ Failed to copy to app directory: {result.stdout.strip()}")
                 return False
 
-            # Clean up temp file
-            subprocess.run(self._get_adb_cmd(['shell', f'rm {temp_path}']), capture_output=True)
+            self.clear_result_cache()
+            # The device now holds the local copy's contents
+            self._pulled_version = self._get_device_db_version()
             
             print(f"✅ Database pushed successfully")
             return True
@@ -938,9 +1971,96 @@ class SQLiteADBQueryTool:
             return [row['name'] for row in results]
         return []
     
+    def get_table_counts(self, tables: Optional[List[str]] = None, exact: bool = True) -> Dict[str, int]:
+        """
+        Get row counts for many tables with one query (one device round trip)
+        instead of one COUNT(*) query per table.
+
+        Args:
+            tables: Table names (default: all tables)
+            exact: Use COUNT(*), which scans every table. If False, counts are estimated from
+                   sqlite_stat1 (when ANALYZE has been run) or MAX(rowid) - O(log n) per table,
+                   but too high after deletes. WITHOUT ROWID tables are always counted exactly.
+
+        Returns:
+            Dict mapping table name to row count (tables that failed are omitted)
+        """
+        if tables is None:
+            tables = self.get_table_list()
+
+        estimate = set()
+        has_stat1 = False
+        if not exact:
+            schema = self.execute_query("SELECT name, sql FROM sqlite_master WHERE type='table';") or []
+            has_stat1 = any(row['name'] == 'sqlite_stat1' for row in schema)
+            estimate = {row['name'] for row in schema
+                        if not WITHOUT_ROWID_RE.search(row['sql'] or '')} & set(tables)
+
+        counts = {}
+        # SQLite caps compound SELECTs at 500 terms by default
+        for start in range(0, len(tables), COUNT_BATCH_SIZE):
+            batch = tables[start:start + COUNT_BATCH_SIZE]
+            query = " UNION ALL ".join(
+                f"SELECT {self._quote_literal(t)} AS name, {self._count_expr(t, t in estimate, has_stat1)} AS count"
+                for t in batch
+            ) + ";"
+            results = self.execute_query(query)
+            if results:
+                counts.update((row['name'], row['count']) for row in results)
+        return counts
+
+    def _count_expr(self, table_name: str, estimate: bool, has_stat1: bool) -> str:
+        """
+        Build the SQL expression counting one table's rows for get_table_counts.
+
+        Args:
+            table_name: Name of the table
+            estimate: Estimate instead of COUNT(*) (rowid tables only)
+            has_stat1: Whether sqlite_stat1 exists
+
+        Returns:
+            str: Scalar SQL expression
+        """
+        table = self._quote_ident(table_name)
+        if not estimate:
+            return f"(SELECT COUNT(*) FROM {table})"
+
+        # sqlite_stat1.stat starts with the row count (table row first, then index rows)
+        stat = (f"(SELECT CAST(stat AS INTEGER) FROM sqlite_stat1 WHERE tbl = {self._quote_literal(table_name)} "
+                f"ORDER BY idx IS NOT NULL LIMIT 1), ") if has_stat1 else ""
+        return f"COALESCE({stat}(SELECT MAX(_ROWID_) FROM {table}), 0)"
+
+    @staticmethod
+    def _quote_ident(name: str) -> str:
+        """Quote an SQL identifier (table/column name)."""
+        return '"' + name.replace('"', '""') + '"'
+
+    @staticmethod
+    def _quote_literal(value: str) -> str:
+        """Quote an SQL string literal."""
+        return "'" + value.replace("'", "''") + "'"
+
+    def _current_schema_cache(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the table_info cache, emptied first if the database may have changed since
+        it was filled (e.g. the app ran a migration on the device). The check reads the
+        change token, a stat on the device, so callers should hold pin_change_token() to
+        share it with the rest of their request.
+
+        Returns:
+            Dict mapping table name to PRAGMA table_info rows
+        """
+        version = self.get_data_version()
+        with self._cache_lock:
+            if version is None or version != self._schema_version:
+                self._schema_cache.clear()
+                self._schema_version = version
+        return self._schema_cache
+
     def get_table_info(self, table_name: str) -> List[Dict[str, Any]]:
         """
         Get detailed information about a table structure.
+        Cached per table while the database is unchanged (see get_data_version).
         
         Args:
             table_name: Name of the table
@@ -948,9 +2068,41 @@ class SQLiteADBQueryTool:
         Returns:
             List of column information dictionaries
         """
-        query = f"PRAGMA table_info({table_name});"
-        return self.execute_query(query) or []
+        schema = self._current_schema_cache()
+        if table_name in schema:
+            return schema[table_name]
+
+        query = f"PRAGMA table_info({self._quote_ident(table_name)});"
+        columns = self.execute_query(query) or []
+        if columns:
+            # A missing table isn't remembered - it may be created later
+            schema[table_name] = columns
+        return columns
     
+    def preload_table_info(self) -> bool:
+        """
+        Fill the table_info cache for every table with a single query
+        (pragma_table_info table-valued function, SQLite 3.16+).
+
+        Returns:
+            bool: True if the cache was filled, False if the query failed
+        """
+        # Versioned before the query runs - a change during it empties the cache on the next lookup
+        cache = self._current_schema_cache()
+        query = ("SELECT m.name AS __table, p.* FROM sqlite_master AS m "
+                 "JOIN pragma_table_info(m.name) AS p WHERE m.type = 'table' ORDER BY m.name, p.cid;")
+        results = self.execute_query(query)
+        if results is None:
+            return False
+
+        schema = {}
+        for row in results:
+            # Copy - the rows may also be held by the result cache
+            column = dict(row)
+            schema.setdefault(column.pop('__table'), []).append(column)
+        cache.update(schema)
+        return True
+
     def get_table_count(self, table_name: str) -> int:
         """
         Get row count for a table.
@@ -961,7 +2113,7 @@ class SQLiteADBQueryTool:
         Returns:
             Number of rows in the table
         """
-        query = f"SELECT COUNT(*) as count FROM {table_name};"
+        query = f"SELECT COUNT(*) as count FROM {self._quote_ident(table_name)};"
         results = self.execute_query(query)
         
         if results:
@@ -983,9 +2135,7 @@ class SQLiteADBQueryTool:
         Returns:
             List of dictionaries containing query results, or None if error
         """
-        # Add LIMIT clause if specified
-        if limit and 'LIMIT' not in query.upper() and query.strip().upper().startswith('SELECT'):
-            query = f"{query.rstrip(';')} LIMIT {limit};"
+        query = self._apply_limit(query, limit)
 
         # Try remote execution first if not forced to use local
         if prefer_remote and not self.force_local:
@@ -995,16 +2145,7 @@ class SQLiteADBQueryTool:
                 if results is not None:
                     return results
 
-                # Check if the error is a SQL/database error that won't be fixed by local execution
-                # These errors indicate the query itself is problematic, not the remote execution
-                sql_errors = [
-                    'no such table', 'no such column', 'syntax error',
-                    'near "', 'unrecognized token', 'no such function',
-                    'table already exists', 'unique constraint failed',
-                    'foreign key constraint failed', 'not null constraint failed',
-                    'check constraint failed', 'datatype mismatch'
-                ]
-                if self.last_error and any(err in self.last_error.lower() for err in sql_errors):
+                if self._last_error_is_sql_error():
                     # SQL error - don't fall back, the same error will occur locally
                     print("❌ Query failed due to SQL error (not falling back to local - same database)")
                     return None
@@ -1015,6 +2156,133 @@ class SQLiteADBQueryTool:
         # Fall back to local execution
         return self.execute_query_local(query)
 
+    @staticmethod
+    def _apply_limit(query: str, limit: Optional[int]) -> str:
+        """Add a LIMIT clause to a SELECT that doesn't already have one."""
+        if limit and SELECT_RE.match(query) and not LIMIT_CLAUSE_RE.search(query):
+            query = f"{query.rstrip(';')} LIMIT {limit};"
+        return query
+
+    def iter_query(self, query: str, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming counterpart of execute_query for read queries: rows are yielded as they
+        come off the device (or the local copy) instead of being collected into a list.
+        Results are not cached, and there is no remote-to-local fallback.
+
+        Args:
+            query: SQL query to execute
+            limit: Optional limit for SELECT queries
+
+        Returns:
+            Iterator over result rows as dictionaries
+
+        Raises:
+            RuntimeError: If the query fails (message is also stored in last_error)
+        """
+        query = self._apply_limit(query, limit)
+        if not self.force_local and self.check_run_as_support():
+            return self.iter_remote_query(query)
+        return self.iter_local_query(query)
+
+    def _last_error_is_sql_error(self) -> bool:
+        """
+        Check if the last error is a SQL/database error that won't be fixed by local execution.
+        These errors indicate the query itself is problematic, not the remote execution.
+        """
+        sql_errors = [
+            'no such table', 'no such column', 'syntax error',
+            'near "', 'unrecognized token', 'no such function',
+            'table already exists', 'unique constraint failed',
+            'foreign key constraint failed', 'not null constraint failed',
+            'check constraint failed', 'datatype mismatch'
+        ]
+        return bool(self.last_error) and any(err in self.last_error.lower() for err in sql_errors)
+
+    def execute_many(self, queries: List[str]) -> bool:
+        """
+        Execute several write queries atomically in a single transaction.
+        On the device this costs one sqlite3 run and one fsync instead of one per query.
+
+        Args:
+            queries: SQL write queries (INSERT/UPDATE/DELETE/...)
+
+        Returns:
+            bool: True if all queries were committed, False otherwise
+        """
+        if not queries:
+            return True
+
+        if not self.force_local and self.check_run_as_support():
+            print("🚀 Using fast remote query execution...")
+            if self.execute_remote_query(list(queries)) is not None:
+                return True
+
+            if self._last_error_is_sql_error():
+                print("❌ Query failed due to SQL error (not falling back to local - same database)")
+                return False
+
+            print("⚠️  Remote execution failed, falling back to local...")
+
+        return self._execute_many_local(queries)
+
+    def _ensure_local_copy(self) -> bool:
+        """
+        Make sure the local copy exists and is a copy of the current device database,
+        pulling it when it is missing or the device database changed since the pull.
+        A copy whose freshness can't be determined is used as is.
+
+        Returns:
+            bool: True if a local copy is ready, False if the pull failed
+        """
+        with self._pull_lock:
+            if self.local_db_path and os.path.exists(self.local_db_path):
+                version = self._get_device_db_version()
+                if version is None or version == self._pulled_version:
+                    return True
+                print("📝 Device database changed since it was pulled, re-pulling...")
+                return self.pull_database(force=True)
+
+            print("📥 Pulling database for local execution...")
+            return self.pull_database()
+
+    def _execute_many_local(self, queries: List[str]) -> bool:
+        """
+        Execute write queries in one transaction on the local copy, then push it once.
+
+        Args:
+            queries: SQL write queries
+
+        Returns:
+            bool: True if all queries were committed, False otherwise
+        """
+        self.last_error = None  # Clear previous error
+        if not self._ensure_local_copy():
+            self.last_error = "Failed to pull database for local execution"
+            print(f"❌ {self.last_error}")
+            return False
+
+        try:
+            conn = self._get_local_connection(read_only=False)
+            with conn:  # Commits on success, rolls back on error
+                for query in queries:
+                    conn.execute(query)
+            print(f"✅ {len(queries)} queries executed successfully in one transaction.")
+
+            print("📤 Pushing changes back to device...")
+            if self.push_database():
+                print("✅ Changes synced to device")
+            elif self.last_error:
+                # Push refused - the next local query re-pulls and drops this write
+                return False
+            else:
+                print("⚠️  Warning: Changes were not synced to device. You may need to restart the app.")
+            return True
+
+        except sqlite3.Error as e:
+            self.last_error = str(e)
+            print(f"❌ SQLite error: {self.last_error}")
+            return False
+
     def execute_query_local(self, query: str) -> Optional[List[Dict[str, Any]]]:
         """
         Execute a SQL query on the local database copy.
@@ -1027,26 +2295,24 @@ class SQLiteADBQueryTool:
             List of dictionaries containing query results, or None if error
         """
         self.last_error = None  # Clear previous error
-        if not self.local_db_path or not os.path.exists(self.local_db_path):
-            print("📥 Pulling database for local execution...")
-            if not self.pull_database():
-                self.last_error = "Failed to pull database for local execution"
-                print(f"❌ {self.last_error}")
-                return None
+        if not self._ensure_local_copy():
+            self.last_error = "Failed to pull database for local execution"
+            print(f"❌ {self.last_error}")
+            return None
 
         try:
-            conn = sqlite3.connect(self.local_db_path)
-            conn.row_factory = sqlite3.Row  # Enable dict-like access
+            match = FIRST_KEYWORD_RE.match(query)
+            conn = self._get_local_connection(read_only=bool(match) and match.group(1).upper() in READ_ONLY_OPERATIONS)
             cursor = conn.cursor()
 
             cursor.execute(query)
 
-            if query.strip().upper().startswith('SELECT') or query.strip().upper().startswith('PRAGMA'):
-                results = cursor.fetchall()
-                # Convert to list of dictionaries
-                return [dict(row) for row in results]
+            if ROW_QUERY_RE.match(query):
+                # Convert to list of dictionaries straight off the cursor (no fetchall() copy)
+                return [dict(row) for row in cursor]
             else:
                 conn.commit()
+                self.clear_result_cache()
                 affected_rows = cursor.rowcount
                 print(f"✅ Query executed successfully. {affected_rows} rows affected.")
 
@@ -1055,6 +2321,9 @@ class SQLiteADBQueryTool:
                     print("📤 Pushing changes back to device...")
                     if self.push_database():
                         print("✅ Changes synced to device")
+                    elif self.last_error:
+                        # Push refused - the next local query re-pulls and drops this write
+                        return None
                     else:
                         print("⚠️  Warning: Changes were not synced to device. You may need to restart the app.")
 
@@ -1063,13 +2332,43 @@ class SQLiteADBQueryTool:
         except sqlite3.Error as e:
             self.last_error = str(e)
             print(f"❌ SQLite error: {self.last_error}")
+            # Don't leave a half-done implicit transaction open on the shared connection
+            if 'conn' in locals() and conn.in_transaction:
+                conn.rollback()
             return None
-        finally:
-            if 'conn' in locals():
-                conn.close()
     
+    def iter_local_query(self, query: str) -> Iterator[Dict[str, Any]]:
+        """
+        Execute a read query on the local database copy and yield rows one at a time,
+        so large result sets are never held in memory.
+        Automatically pulls the database if not already available.
+
+        Args:
+            query: SQL query to execute
+
+        Yields:
+            Dictionaries containing one result row each
+
+        Raises:
+            RuntimeError: If the database can't be pulled or the query fails (message is also stored in last_error)
+        """
+        self.last_error = None  # Clear previous error
+        if not self._ensure_local_copy():
+            self.last_error = "Failed to pull database for local execution"
+            raise RuntimeError(self.last_error)
+
+        conn = self._get_local_connection(read_only=True)
+        try:
+            for row in conn.execute(query):
+                yield dict(row)
+        except sqlite3.Error as e:
+            self.last_error = str(e)
+            raise RuntimeError(self.last_error) from e
+
     def cleanup(self):
         """Clean up temporary database file (but preserve cache)."""
+        self.close()
+
         if self.local_db_path and os.path.exists(self.local_db_path):
             # Don't delete cached databases
             if self.use_cache and str(self.cache_dir) in self.local_db_path:
@@ -1084,7 +2383,10 @@ class SQLiteADBQueryTool:
 
     def clear_cache(self):
         """Clear the database cache."""
+        self.clear_result_cache()
+        self._close_local_connection()
         try:
+            self._metadata_cache = None
             if self.cache_metadata_file.exists():
                 os.unlink(self.cache_metadata_file)
 
@@ -1107,14 +2409,8 @@ class SQLiteADBQueryTool:
             limit: Number of rows to display
             offset: Number of rows to skip
         """
-        # Get table structure
-        columns = self.get_table_info(table_name)
-        if not columns:
-            print(f"❌ Could not get table structure for {table_name}")
-            return
-        
-        # Get data
-        query = f"SELECT * FROM {table_name} LIMIT {limit} OFFSET {offset};"
+        # Get data (column names come from the rows themselves - no separate table_info query)
+        query = f"SELECT * FROM {self._quote_ident(table_name)} LIMIT {int(limit)} OFFSET {int(offset)};"
         data = self.execute_query(query)
         
         if data is None:
@@ -1130,19 +2426,66 @@ class SQLiteADBQueryTool:
         print(f"📈 Showing {len(data)} rows (offset: {offset})")
         print("=" * 80)
         
-        # Print column headers
-        headers = [col['name'] for col in columns]
-        header_str = " | ".join(f"{h:<15}" for h in headers)
-        print(header_str)
-        print("-" * len(header_str))
-        
-        # Print data rows
-        for row in data:
-            row_str = " | ".join(f"{str(row.get(h, '')):<15}" for h in headers)
-            print(row_str)
-        
+        self.print_rows(data)
         print("=" * 80)
+
+    @staticmethod
+    def print_rows(rows: List[Dict[str, Any]]):
+        """
+        Print rows as a column-aligned text table (header, separator, one line per row).
+        The whole block is written to stdout at once rather than with a print() per row.
+
+        Args:
+            rows: Non-empty list of row dictionaries; column names come from the first row
+        """
+        headers = list(rows[0].keys())
+        # One format string for the whole line: padding and joining happen in C, and
+        # map() calls row.get(h, '') without a Python-level loop per cell
+        fmt = " | ".join(["{:<15}"] * len(headers))
+        blanks = [''] * len(headers)
+        header_str = fmt.format(*headers)
+        lines = [header_str, "-" * len(header_str)]
+        lines.extend(fmt.format(*map(str, map(row.get, headers, blanks))) for row in rows)
+        lines.append("")
+        sys.stdout.write("\n".join(lines))
     
+    def _export_csv_with_cli(self, query: str, fieldnames: List[str], output_file: str) -> bool:
+        """
+        Export query results from the local copy with the host's sqlite3 CLI in CSV mode,
+        which formats rows in C instead of a Python loop.
+
+        Args:
+            query: SQL query to export
+            fieldnames: Column names for the header row
+            output_file: Output CSV file path
+
+        Returns:
+            bool: True if exported; False if the CLI or the local copy isn't available
+                  (or the CLI failed), so the caller should use the Python path
+        """
+        sqlite3_cli = shutil.which('sqlite3')
+        if not sqlite3_cli or not self.local_db_path or not os.path.exists(self.local_db_path):
+            return False
+
+        try:
+            with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+                # Header written here: the CLI's -header prints nothing for an empty result
+                csv.writer(csvfile).writerow(fieldnames)
+                csvfile.flush()
+                result = subprocess.run([sqlite3_cli, '-readonly', '-bail', '-csv', '-newline', '\r\n',
+                                         self.local_db_path, query],
+                                        stdout=csvfile, stderr=subprocess.PIPE, timeout=600, **SUBPROCESS_FLAGS)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"⚠️  sqlite3 CLI export failed ({e}), using Python export")
+            return False
+
+        if result.returncode != 0:
+            print(f"⚠️  sqlite3 CLI export failed ({result.stderr.decode('utf-8', errors='replace').strip()}), using Python export")
+            return False
+
+        print(f"✅ Exported to {output_file} (sqlite3 CLI)")
+        return True
+
     def export_to_csv(self, table_name: str, output_file: str, limit: Optional[int] = None):
         """
         Export table data to CSV file.
@@ -1152,7 +2495,6 @@ class SQLiteADBQueryTool:
             output_file: Output CSV file path
             limit: Optional row limit
         """
-        import csv
         
         # Get table structure
         columns = self.get_table_info(table_name)
@@ -1161,12 +2503,21 @@ class SQLiteADBQueryTool:
             return
         
         # Get data
-        query = f"SELECT * FROM {table_name}"
+        query = f"SELECT * FROM {self._quote_ident(table_name)}"
         if limit:
-            query += f" LIMIT {limit}"
+            query += f" LIMIT {int(limit)}"
         query += ";"
         
-        data = self.execute_query(query)
+        fieldnames = [col['name'] for col in columns]
+
+        # Stream rows straight from the device in sqlite3's -ascii mode when remote
+        # execution is available - CSV only needs the values as text anyway
+        if not self.force_local and self.check_run_as_support():
+            data = self.iter_remote_query_text(query)
+        elif self._export_csv_with_cli(query, fieldnames, output_file):
+            return
+        else:
+            data = ([row.get(name) for name in fieldnames] for row in self.iter_local_query(query))
         
         if data is None:
             print(f"❌ Could not fetch data from {table_name}")
@@ -1174,14 +2525,15 @@ class SQLiteADBQueryTool:
         
         try:
             with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = [col['name'] for col in columns]
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+                writer = csv.writer(csvfile)
                 
-                writer.writeheader()
+                writer.writerow(fieldnames)
+                row_count = 0
                 for row in data:
                     writer.writerow(row)
+                    row_count += 1
             
-            print(f"✅ Exported {len(data)} rows to {output_file}")
+            print(f"✅ Exported {row_count:,} rows to {output_file}")
             
         except Exception as e:
             print(f"❌ Error exporting to CSV: {e}")
@@ -1266,6 +2618,8 @@ Notes:
                        help='Export table to CSV')
     parser.add_argument('--output', metavar='FILE',
                        help='Output file for export (default: table_name.csv)')
+    parser.add_argument('--exact-counts', action='store_true',
+                       help='Count table rows exactly with COUNT(*) (slower on large tables)')
     parser.add_argument('--limit', type=int, default=20,
                        help='Row limit for queries (default: 20)')
     parser.add_argument('--offset', type=int, default=0,
@@ -1280,6 +2634,10 @@ Notes:
                        help='Force re-pull database even if cache is valid')
     parser.add_argument('--no-compression', action='store_true',
                        help='Disable gzip compression during transfer')
+    parser.add_argument('--adb-compression', choices=ADB_COMPRESSION_ALGORITHMS,
+                       help='Let adb compress pulls (adb pull -z) instead of gzip on the device (needs adb 31+)')
+    parser.add_argument('--verify-pull', action='store_true',
+                       help="Compare the pulled database with the device's sha256sum (reads the file twice on the device)")
     parser.add_argument('--clear-cache', action='store_true',
                        help='Clear the database cache and exit')
     
@@ -1293,8 +2651,10 @@ Notes:
         use_cache=not args.no_cache,
         force_pull=args.force_pull,
         user_id=args.user,
-        device_serial=args.device
+        device_serial=args.device,
+        adb_compression=args.adb_compression
     )
+    tool.verify_pulls = args.verify_pull
 
     try:
         # Handle --clear-cache flag
@@ -1312,9 +2672,8 @@ Notes:
             sys.exit(1)
 
         # Determine if we need to pull the database
-        # Only pull for: exports or when forced (remote execution handles write queries now)
+        # Only pull when forced - remote execution handles reads, writes and (streamed) exports
         needs_pull = (
-            args.export or
             args.force_local or
             args.force_pull
         )
@@ -1324,14 +2683,18 @@ Notes:
             if not tool.pull_database(use_compression=not args.no_compression):
                 sys.exit(1)
 
+        # Row counts in table listings are estimates unless --exact-counts is given
+        approx = "" if args.exact_counts else "~"
+
         # Execute requested action
         if args.list_tables:
             print("\n📋 Available Tables:")
             print("=" * 40)
             tables = tool.get_table_list()
+            counts = tool.get_table_counts(tables, exact=args.exact_counts)
             for table in tables:
-                count = tool.get_table_count(table)
-                print(f"  {table:<30} ({count:,} rows)")
+                count = counts.get(table, 0)
+                print(f"  {table:<30} ({approx}{count:,} rows)")
         
         elif args.table_info:
             print(f"\n📋 Table Structure: {args.table_info}")
@@ -1355,13 +2718,7 @@ Notes:
             if results is not None:
                 if results:
                     # Print results in table format
-                    headers = list(results[0].keys())
-                    header_str = " | ".join(f"{h:<15}" for h in headers)
-                    print(header_str)
-                    print("-" * len(header_str))
-                    for row in results:
-                        row_str = " | ".join(f"{str(row.get(h, '')):<15}" for h in headers)
-                        print(row_str)
+                    tool.print_rows(results)
                     print(f"\n📊 Total rows: {len(results)}")
                 else:
                     print("📭 No results returned")
@@ -1382,9 +2739,10 @@ Notes:
             
             if tables:
                 print("\n📋 Tables with row counts:")
+                counts = tool.get_table_counts(tables, exact=args.exact_counts)
                 for table in tables:
-                    count = tool.get_table_count(table)
-                    print(f"  {table:<30} ({count:,} rows)")
+                    count = counts.get(table, 0)
+                    print(f"  {table:<30} ({approx}{count:,} rows)")
         
         # Note: --push flag is deprecated as write queries now execute directly on device via remote execution
         # Kept for backwards compatibility but does nothing when remote execution is available
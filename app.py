@@ -4,12 +4,25 @@ Flask Web Application for ADB SQLite Query Tool
 Provides a web interface to query SQLite database on Android device via ADB
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from dotenv import load_dotenv
 import sys
 import os
 import subprocess
+import threading
+import time
+import gzip
+import hashlib
+import json
+import re
+import shutil
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from pathlib import Path
 
 # Load environment variables
 load_dotenv()
@@ -18,10 +31,51 @@ load_dotenv()
 PYTHON_TOOLS_PATH = os.getenv('PYTHON_TOOLS_PATH', '/Users/siddharth/Desktop/all-old/own-projects/winitsoftware/application1/python_tools')
 sys.path.insert(0, PYTHON_TOOLS_PATH)
 
-from adb_sqlite_query_tool import SQLiteADBQueryTool
+from adb_sqlite_query_tool import AdbShellSession, SQLiteADBQueryTool, SELECT_RE, SUBPROCESS_FLAGS
+
+try:
+    from isal import igzip  # Optional: ISA-L gzip decoder, several times faster than zlib
+except ImportError:
+    igzip = None
+
+try:
+    import orjson  # Optional: C JSON encoder, several times faster than the json module
+except ImportError:
+    orjson = None
+
+try:
+    from flask_compress import Compress  # Optional: gzip/brotli response compression
+except ImportError:
+    Compress = None
+
+class ORJSONProvider(DefaultJSONProvider):
+    """jsonify()/request.json through orjson; types it can't encode go through Flask's default()"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes to the response as-is, skipping dumps()' decode and re-encode
+        option = orjson.OPT_NON_STR_KEYS
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        body = orjson.dumps(self._prepare_response_obj(args, kwargs), default=self.default, option=option)
+        return self._app.response_class(body, mimetype=self.mimetype)
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
 CORS(app)
+if Compress is not None:
+    # Row JSON compresses very well; a low level keeps CPU cost per response small
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_MIN_SIZE'] = 512
+    app.config['COMPRESS_LEVEL'] = 4
+    app.config['COMPRESS_BR_LEVEL'] = 4
+    Compress(app)
 
 # Global configuration - can be modified at runtime via API
 app_config = {
@@ -30,30 +84,422 @@ app_config = {
     'db_path': os.getenv('DB_PATH', ''),  # Custom path, empty means auto-detect
     'device_serial': os.getenv('DEVICE_SERIAL', ''),
     'use_cache': os.getenv('USE_CACHE', 'True').lower() == 'true',
-    'force_local': os.getenv('FORCE_LOCAL', 'False').lower() == 'true'
+    'force_local': os.getenv('FORCE_LOCAL', 'False').lower() == 'true',
+    'adb_compression': os.getenv('ADB_COMPRESSION', '') or None  # adb pull -z algorithm, e.g. zstd
 }
 
+class TTLCache:
+    """Tiny dict-backed cache whose entries expire `ttl` seconds after being set"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                return default
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SingleFlight:
+    """Runs one call per key at a time; identical calls arriving meanwhile wait for it and share its result"""
+
+    def __init__(self):
+        self._calls = {}  # key -> {'done': Event, 'result' or 'error'}
+        self._lock = threading.Lock()
+
+    def run(self, key, fn, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'done': threading.Event()}
+
+        if not leader:
+            call['done'].wait()
+            if 'error' in call:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = fn(*args)
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+
+# Device/database probes shared by bursts of UI requests (each probe spawns adb)
+PROBE_TTL = float(os.getenv('PROBE_TTL', '3'))
+_probe_cache = TTLCache(PROBE_TTL)
+
+def device_connected(tool):
+    """check_adb_connection(), re-asked at most once per PROBE_TTL seconds"""
+    connected = _probe_cache.get((tool, 'adb'))
+    if connected is None:
+        connected = tool.check_adb_connection(refresh=True)
+        _probe_cache.set((tool, 'adb'), connected)
+    return connected
+
+def database_exists(tool):
+    """check_database_exists(), re-probed at most once per PROBE_TTL seconds"""
+    exists = _probe_cache.get((tool, 'db'))
+    if exists is None:
+        exists = tool.check_database_exists(refresh=True)
+        _probe_cache.set((tool, 'db'), exists)
+    return exists
+
+# One persistent `adb shell` per device for the package/database listing endpoints,
+# instead of a new adb client process for every command
+_device_shells = {}
+_device_shells_lock = threading.Lock()
+
+def device_shell(device_serial, command, timeout):
+    """
+    Run a command in the device's persistent adb shell session (started on first use).
+
+    Args:
+        device_serial: Device serial, or '' for the only connected device
+        command: Shell command line
+        timeout: Seconds to wait for the command to finish
+
+    Returns:
+        CompletedProcess with merged stdout/stderr in stdout
+    """
+    with _device_shells_lock:
+        shell = _device_shells.get(device_serial)
+        if shell is None:
+            shell = AdbShellSession(['adb', '-s', device_serial] if device_serial else ['adb'])
+            _device_shells[device_serial] = shell
+    return shell.run(command, timeout=timeout)
+
+# Seconds each listing call may take. `adb devices` can include a cold adb server start (a few
+# seconds); the package scan runs run-as once per installed package; the rest are single shell commands
+ADB_TIMEOUTS = {'devices': 10, 'packages': 120, 'databases': 5, 'search': 30}
+
+# Appended to timeout errors - a hung adb server is the usual cause
+ADB_TIMEOUT_HINT = 'If this keeps happening, restart adb: adb kill-server && adb start-server'
+
+# `adb devices -l` line of a usable device ("<serial> device usb:... product:x model:y ..."),
+# and the key:value properties after the state
+DEVICE_LINE_RE = re.compile(r'^(\S+)\s+device(?:\s+(.*))?$')
+DEVICE_PROPERTY_RE = re.compile(r'(\w+):(\S+)')
+
+# App data directories /api/databases lists, in order of preference
+DB_LOCATIONS = ('databases', 'files', 'files/SQLite')
+DB_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+# /api/search-databases: only regular files with a database extension come back
+# (journal/WAL/SHM names never match these)
+DB_FIND_CMD = 'find . -type f \\( -name "*.db" -o -name "*.sqlite" -o -name "*.sqlite3" \\) 2>/dev/null'
+
+# Concurrent run-as probes when scanning a device for debuggable packages
+PACKAGE_PROBE_JOBS = 8
+
+# Package/database listings (run-as scans over adb) reused across page loads and
+# device switches; dropped on config changes and database refreshes
+LISTING_TTL = float(os.getenv('LISTING_TTL', '60'))
+_listing_cache = TTLCache(LISTING_TTL)
+# Double clicks and page reloads fire the same slow adb scans twice - run them once
+_in_flight = SingleFlight()
+
+def cached_listing(key, scan, *args):
+    """
+    Listing for key from _listing_cache, or scan(*args) on a miss. Concurrent misses
+    for the same key share one scan.
+    """
+    listing = _listing_cache.get(key)
+    if listing is None:
+        listing = _in_flight.run(key, scan, *args)
+        # An empty scan usually means the device went away - don't remember it
+        if listing:
+            _listing_cache.set(key, listing)
+    return listing
+
+def connection_error(tool):
+    """
+    Check that the device is connected and the database is on it, through the probe cache.
+    When neither probe is fresh they run at the same time: `adb devices` and the tool's
+    database probe use separate adb connections.
+
+    Returns:
+        Error message for the response, or None if both checks pass
+    """
+    if _probe_cache.get((tool, 'adb')) is None and _probe_cache.get((tool, 'db')) is None:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            exists_future = executor.submit(database_exists, tool)
+            connected = device_connected(tool)
+            exists = exists_future.result()
+    else:
+        connected = device_connected(tool)
+        exists = connected and database_exists(tool)
+
+    if not connected:
+        return 'No ADB device connected'
+    if not exists:
+        return 'Database not found on device'
+    return None
+
+# Extra column carrying the table's total row count in /api/table-data queries
+TOTAL_COUNT_COLUMN = '__sqlite_devtools_total'
+
+# Rows serialized per chunk of a streamed response
+STREAM_BATCH_ROWS = 1000
+# SELECTs allowed more rows than this (or unlimited) are read lazily from a cursor instead
+# of through execute_query, which buffers every row (and keeps them in its result cache)
+STREAM_MIN_ROWS = 5000
+
+def dumps_json(obj):
+    """Serialize to JSON bytes with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=app.json.default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':'), default=app.json.default).encode()
+
+def stream_rows_response(rows, **fields):
+    """
+    JSON response {<fields>, "rows": [[...], ...], "row_count": n, "success": true} sent in
+    chunks of STREAM_BATCH_ROWS rows, so the whole body is never built as one string.
+    rows may be a lazy iterator; row_count is counted as it is consumed.
+
+    The status line has gone out before the rows are read, so a query that fails part way
+    through still answers 200: the rows array is closed after the rows sent so far and the
+    object ends with "success": false and "error" instead - clients must check success.
+    """
+    def generate():
+        head = dumps_json(fields)[:-1]
+        yield head + (b',"rows":[' if fields else b'"rows":[')
+        it = iter(rows)
+        separator = b''
+        row_count = 0
+        error = None
+        try:
+            while True:
+                batch = list(islice(it, STREAM_BATCH_ROWS))
+                if not batch:
+                    break
+                row_count += len(batch)
+                yield separator + b','.join(map(dumps_json, batch))
+                separator = b','
+        except Exception as e:
+            error = str(e)
+        tail = {'row_count': row_count, 'success': error is None}
+        if error is not None:
+            tail['error'] = error
+        yield b'],' + dumps_json(tail)[1:]
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+def fetch_rows(tool, query, limit=None):
+    """
+    Run a query for a row response.
+
+    Small results go through execute_query (shared shell session, result cache). SELECTs
+    with a larger or no limit are iterated lazily with iter_query, so the rows are never
+    all held in memory; the first row is read up front so SQL errors still surface here.
+
+    Args:
+        tool: SQLiteADBQueryTool to run the query with
+        query: SQL query to execute
+        limit: Maximum number of rows for SELECT queries (None for no limit)
+
+    Returns:
+        (first row or None, iterable over all rows), or None if the query failed
+    """
+    if not SELECT_RE.match(query) or (limit and limit <= STREAM_MIN_ROWS):
+        results = tool.execute_query(query, limit=limit)
+        if results is None:
+            return None
+        return (results[0] if results else None), results
+
+    rows = tool.iter_query(query, limit=limit)
+    try:
+        first = next(rows)
+    except StopIteration:
+        return None, []
+    except RuntimeError:
+        return None
+    return first, chain([first], rows)
+
+def ensure_decompressed(db_file):
+    """Decompress a pulled database in place if it arrived gzipped (Windows compatible check)"""
+    if not db_file.exists():
+        return
+    try:
+        with open(db_file, 'rb') as f:
+            magic = f.read(2)
+        if magic == b'\x1f\x8b':  # gzip magic number
+            print(f"Detected gzipped database, decompressing...")
+            # Decompress next to the file, then swap it in (no rename to .gz first)
+            tmp_file = db_file.with_name(db_file.name + '.tmp')
+            gzip_open = igzip.open if igzip is not None else gzip.open
+            with gzip_open(db_file, 'rb') as f_in:
+                with open(tmp_file, 'wb') as f_out:
+                    shutil.copyfileobj(f_in, f_out, length=1 << 20)
+            tmp_file.replace(db_file)
+            print(f"Database decompressed successfully")
+    except Exception as e:
+        print(f"Warning: Could not check/decompress file: {e}")
+
+def data_etag(tool, version):
+    """Weak ETag for the current request's response at a given tool data version"""
+    if not version:
+        return None
+    key = f"{tool.cache_metadata_file.name}:{version}:{request.full_path}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+def not_modified(etag):
+    """304 response if the client already holds the response for this ETag, else None"""
+    if etag and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+    return None
+
+def with_etag(response, etag):
+    """Attach an ETag so the browser revalidates instead of re-downloading"""
+    if etag:
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# /api/tables payloads: (tool, counts mode) -> (data version, payload)
+_tables_cache = {}
+
+def _drop_tables_cache(tool):
+    """Forget the cached /api/tables payloads of one tool"""
+    for key in [key for key in _tables_cache if key[0] is tool]:
+        _tables_cache.pop(key, None)
+
+# One tool per configuration, reused across requests so its probes, shell session
+# and caches survive. Switching config back and forth reuses the earlier instance;
+# beyond MAX_TOOLS configurations the least recently used tool is closed.
+MAX_TOOLS = 4
+_tools = OrderedDict()
+_tools_lock = threading.Lock()
+# Serializes operations that replace or delete the local database copy
+tool_write_lock = threading.RLock()
+
 def get_adb_tool():
-    """Get or create ADB tool instance with current configuration"""
-    return SQLiteADBQueryTool(
-        package_name=app_config['package_name'],
-        db_name=app_config['db_name'],
-        force_local=app_config['force_local'],
-        use_cache=app_config['use_cache'],
-        device_serial=app_config['device_serial'] if app_config['device_serial'] else None
+    """Get (or create on first use) the ADB tool instance for the current configuration"""
+    key = (
+        app_config['package_name'],
+        app_config['db_name'],
+        app_config['force_local'],
+        app_config['use_cache'],
+        app_config['device_serial'] or None,
+        app_config['adb_compression']
     )
+    with _tools_lock:
+        tool = _tools.get(key)
+        if tool is not None:
+            _tools.move_to_end(key)
+            return tool
+
+        tool = SQLiteADBQueryTool(
+            package_name=key[0],
+            db_name=key[1],
+            force_local=key[2],
+            use_cache=key[3],
+            device_serial=key[4],
+            adb_compression=key[5]
+        )
+        _tools[key] = tool
+        while len(_tools) > MAX_TOOLS:
+            _, evicted = _tools.popitem(last=False)
+            # Stops its adb shell session and closes its local connection
+            evicted.close()
+            _drop_tables_cache(evicted)
+        return tool
+
+# Background database pulls: job id -> {'state': 'running'|'done'|'error', ...}.
+# Only the most recent MAX_PULL_JOBS jobs are remembered.
+MAX_PULL_JOBS = 20
+_pull_jobs = {}
+_pull_jobs_lock = threading.Lock()
+
+def _run_pull(job_id, tool, message):
+    """Pull a fresh database copy for a background job and record the outcome"""
+    try:
+        # Clear cache first - with no cached copy left, the pull always fetches a fresh one
+        with tool_write_lock:
+            tool.clear_cache()
+            pulled = tool.pull_database()
+            _probe_cache.clear()
+            _drop_tables_cache(tool)
+        # The app may have been reinstalled - its package and database listings too
+        _listing_cache.clear()
+
+        if not pulled:
+            result = {'state': 'error', 'error': 'Failed to pull database from device'}
+        else:
+            # Fix gzip decompression issue
+            ensure_decompressed(Path(tool.local_db_path))
+            result = {'state': 'done', 'message': message}
+    except Exception as e:
+        result = {'state': 'error', 'error': str(e)}
+
+    with _pull_jobs_lock:
+        _pull_jobs[job_id].update(result)
+
+def start_pull(tool, message):
+    """
+    Start pulling the database on a background thread, so the request thread is
+    free again right away. A pull already running for the same tool is reused.
+
+    Args:
+        tool: SQLiteADBQueryTool to pull with
+        message: Status message reported once the pull has finished
+
+    Returns:
+        202 response carrying the job id to poll /api/pull-status/<job_id> with
+    """
+    with _pull_jobs_lock:
+        for job_id, job in _pull_jobs.items():
+            if job['tool'] is tool and job['state'] == 'running':
+                break
+        else:
+            job_id = uuid.uuid4().hex
+            _pull_jobs[job_id] = {'tool': tool, 'state': 'running'}
+            while len(_pull_jobs) > MAX_PULL_JOBS:
+                del _pull_jobs[next(iter(_pull_jobs))]
+            threading.Thread(target=_run_pull, args=(job_id, tool, message), daemon=True).start()
+
+    return jsonify({'success': True, 'job_id': job_id, 'state': 'running'}), 202
 
 @app.route('/')
 def index():
     """Serve the main page"""
-    return render_template('index.html')
+    # index.html has no template tags - send it as a file, with ETag/Last-Modified
+    # so reloads are answered with 304 instead of re-rendering it through Jinja
+    return send_from_directory(app.template_folder, 'index.html')
 
 @app.route('/api/devices', methods=['GET'])
 def get_devices():
     """Get list of connected ADB devices"""
     try:
+        # Reloads and several tabs opening at once ask for the same list
+        devices = _probe_cache.get('devices')
+        if devices is not None:
+            return jsonify({
+                'success': True,
+                'devices': devices,
+                'current_device': app_config['device_serial']
+            })
+
         result = subprocess.run(['adb', 'devices', '-l'],
-                              capture_output=True, text=True, timeout=10)
+                              capture_output=True, text=True, timeout=ADB_TIMEOUTS['devices'], **SUBPROCESS_FLAGS)
 
         if result.returncode != 0:
             return jsonify({'success': False, 'error': 'ADB command failed'})
@@ -62,19 +508,13 @@ def get_devices():
         lines = result.stdout.strip().split('\n')[1:]  # Skip header
 
         for line in lines:
-            if not line.strip():
-                continue
-            parts = line.split()
-            if len(parts) >= 2 and parts[1] == 'device':
-                serial = parts[0]
+            match = DEVICE_LINE_RE.match(line.strip())
+            if match:
+                serial = match.group(1)
                 # Parse device info from the -l output
-                model = ''
-                product = ''
-                for part in parts[2:]:
-                    if part.startswith('model:'):
-                        model = part.split(':')[1]
-                    elif part.startswith('product:'):
-                        product = part.split(':')[1]
+                properties = dict(DEVICE_PROPERTY_RE.findall(match.group(2) or ''))
+                model = properties.get('model', '')
+                product = properties.get('product', '')
 
                 devices.append({
                     'serial': serial,
@@ -83,6 +523,8 @@ def get_devices():
                     'display_name': f"{model or product or serial} ({serial})"
                 })
 
+        _probe_cache.set('devices', devices)
+
         return jsonify({
             'success': True,
             'devices': devices,
@@ -90,46 +532,60 @@ def get_devices():
         })
 
     except subprocess.TimeoutExpired:
-        return jsonify({'success': False, 'error': 'ADB command timed out'})
+        return jsonify({'success': False, 'error': f'ADB command timed out. {ADB_TIMEOUT_HINT}'})
     except FileNotFoundError:
         return jsonify({'success': False, 'error': 'ADB not found. Make sure Android SDK is installed.'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+def scan_packages(device_serial):
+    """
+    List the debuggable third-party packages on a device.
+
+    Args:
+        device_serial: Device serial, or '' for the only connected device
+
+    Returns:
+        Sorted list of package names
+    """
+    # Single shell command: list third-party packages, then test each with run-as
+    # run-as only works on debuggable apps, so this filters automatically
+    # --user 0: target main user only (avoids SecurityException on multi-user/work profile devices)
+    # tr -d '\\r': strips carriage returns from Android's CRLF line endings
+    list_packages = 'pm list packages --user 0 -3 2>/dev/null | tr -d "\\r" | sed "s/package://"'
+    # The run-as probes run PACKAGE_PROBE_JOBS at a time on the device (toybox xargs -P)
+    parallel_script = (
+        f'{list_packages} | '
+        f'xargs -n1 -P{PACKAGE_PROBE_JOBS} sh -c \'run-as "$0" id >/dev/null 2>&1 && echo "$0"\' 2>/dev/null'
+    )
+    # One package after another - for devices whose xargs has no -P
+    serial_script = (
+        f'for p in $({list_packages}); do '
+        'run-as $p id 2>/dev/null 1>/dev/null && echo $p; '
+        'done'
+    )
+
+    # Don't check returncode — the scripts return the exit code of the last
+    # run-as which is non-zero if the last package isn't debuggable
+    packages = []
+    for shell_script in (parallel_script, serial_script):
+        result = device_shell(device_serial, shell_script, timeout=ADB_TIMEOUTS['packages'])
+
+        # One package name per line; names never contain whitespace
+        packages = result.stdout.split()
+        if packages:
+            break
+
+    # Sort packages alphabetically
+    packages.sort()
+    return packages
+
 @app.route('/api/packages', methods=['GET'])
 def get_packages():
     """Get list of debuggable packages on the selected device"""
     try:
         device_serial = request.args.get('device', app_config['device_serial'])
-
-        # Build ADB base command with optional device serial
-        adb_base = ['adb']
-        if device_serial:
-            adb_base.extend(['-s', device_serial])
-
-        # Single shell command: list third-party packages, then test each with run-as
-        # run-as only works on debuggable apps, so this filters automatically
-        # --user 0: target main user only (avoids SecurityException on multi-user/work profile devices)
-        # tr -d '\\r': strips carriage returns from Android's CRLF line endings
-        shell_script = (
-            'for p in $(pm list packages --user 0 -3 2>/dev/null | tr -d "\\r" | sed "s/package://"); do '
-            'run-as $p id 2>/dev/null 1>/dev/null && echo $p; '
-            'done'
-        )
-        cmd = adb_base + ['shell', shell_script]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-
-        # Don't check returncode — the for loop returns the exit code of the last
-        # run-as which is non-zero if the last package isn't debuggable
-
-        packages = []
-        for line in result.stdout.strip().split('\n'):
-            package_name = line.strip()
-            if package_name:
-                packages.append(package_name)
-
-        # Sort packages alphabetically
-        packages.sort()
+        packages = cached_listing(('packages', device_serial), scan_packages, device_serial)
 
         return jsonify({
             'success': True,
@@ -138,10 +594,16 @@ def get_packages():
         })
 
     except subprocess.TimeoutExpired:
-        return jsonify({'success': False, 'error': 'Scanning debuggable packages timed out (this can take a while on first load)'})
+        return jsonify({'success': False, 'error': f'Scanning debuggable packages timed out (this can take a while on first load). {ADB_TIMEOUT_HINT}'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/packages/refresh', methods=['POST'])
+def refresh_packages():
+    """Rescan debuggable packages (and databases), bypassing the listing cache"""
+    _listing_cache.clear()
+    return get_packages()
+
 @app.route('/api/config', methods=['GET'])
 def get_config():
     """Get current configuration"""
@@ -165,6 +627,8 @@ def update_config():
 
         # Update configuration with provided values
         if 'device_serial' in data:
+            if data['device_serial'] != app_config['device_serial']:
+                _listing_cache.clear()
             app_config['device_serial'] = data['device_serial']
         if 'package_name' in data:
             app_config['package_name'] = data['package_name']
@@ -177,6 +641,9 @@ def update_config():
         if 'force_local' in data:
             app_config['force_local'] = bool(data['force_local'])
 
+        # Switching back to an earlier configuration must not reuse its old probe results
+        _probe_cache.clear()
+
         return jsonify({
             'success': True,
             'message': 'Configuration updated successfully',
@@ -186,43 +653,56 @@ def update_config():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+def scan_databases(device_serial, package_name):
+    """
+    List the databases in a package's usual database directories (DB_LOCATIONS).
+
+    Args:
+        device_serial: Device serial, or '' for the only connected device
+        package_name: Package whose data directory is listed
+
+    Returns:
+        List of {'name', 'path'} dicts, one per file name
+    """
+    # name -> database; the first location a name turns up in wins (duplicates dropped)
+    databases = {}
+
+    found = _listing_cache.get(('search', device_serial, package_name))
+    if found is not None:
+        # A recent /api/search-databases scan already covers these locations
+        for location in DB_LOCATIONS:
+            for db in found:
+                if db['path'] == f"{location}/{db['name']}":
+                    databases.setdefault(db['name'], db)
+    else:
+        # One round-trip and one run-as for all locations: each listing is preceded by a
+        # "/<location>" line (file names can't contain a slash, so it can't be mistaken for one)
+        script = (f'run-as {package_name} sh -c \''
+                  f'for d in {" ".join(DB_LOCATIONS)}; do echo "/$d"; ls "$d" 2>/dev/null; done'
+                  '\' 2>/dev/null')
+        result = device_shell(device_serial, script, timeout=ADB_TIMEOUTS['databases'])
+
+        location = None
+        for file in result.stdout.strip().split('\n'):
+            file = file.strip()
+            if file.startswith('/'):
+                location = file[1:]
+            elif location and file.endswith(DB_EXTENSIONS):
+                databases.setdefault(file, {
+                    'name': file,
+                    'path': f'{location}/{file}'
+                })
+
+    return list(databases.values())
+
 @app.route('/api/databases', methods=['GET'])
 def get_databases():
     """Get list of SQLite databases for the selected package"""
     try:
         device_serial = request.args.get('device', app_config['device_serial'])
         package_name = request.args.get('package', app_config['package_name'])
-
-        # Build ADB command
-        adb_cmd = ['adb']
-        if device_serial:
-            adb_cmd.extend(['-s', device_serial])
-
-        databases = []
-
-        # Check multiple possible database locations
-        db_locations = ['databases', 'files', 'files/SQLite']
-
-        for location in db_locations:
-            cmd = adb_cmd + ['shell', f'run-as {package_name} ls {location} 2>/dev/null']
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-
-            if result.returncode == 0:
-                for file in result.stdout.strip().split('\n'):
-                    file = file.strip()
-                    if file and (file.endswith('.db') or file.endswith('.sqlite') or file.endswith('.sqlite3')):
-                        databases.append({
-                            'name': file,
-                            'path': f'{location}/{file}'
-                        })
-
-        # Remove duplicates based on name
-        seen = set()
-        unique_databases = []
-        for db in databases:
-            if db['name'] not in seen:
-                seen.add(db['name'])
-                unique_databases.append(db)
+        unique_databases = cached_listing(('databases', device_serial, package_name),
+                                          scan_databases, device_serial, package_name)
 
         return jsonify({
             'success': True,
@@ -231,10 +711,43 @@ def get_databases():
         })
 
     except subprocess.TimeoutExpired:
-        return jsonify({'success': False, 'error': 'ADB command timed out'})
+        return jsonify({'success': False, 'error': f'ADB command timed out. {ADB_TIMEOUT_HINT}'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+def find_databases(device_serial, package_name):
+    """
+    Find every database file anywhere in a package's data directory.
+
+    Args:
+        device_serial: Device serial, or '' for the only connected device
+        package_name: Package whose data directory is searched
+
+    Returns:
+        List of {'name', 'path'} dicts, sorted by name
+    """
+    # Use find to recursively search for db files
+    result = device_shell(device_serial, f'run-as {package_name} {DB_FIND_CMD}', timeout=ADB_TIMEOUTS['search'])
+
+    databases = []
+    if result.returncode == 0:
+        for line in result.stdout.strip().split('\n'):
+            file_path = line.strip()
+            if not file_path:
+                continue
+            # Clean up the path (remove leading ./)
+            if file_path.startswith('./'):
+                file_path = file_path[2:]
+            file_name = file_path.split('/')[-1]
+            databases.append({
+                'name': file_name,
+                'path': file_path
+            })
+
+    # Sort by name
+    databases.sort(key=lambda x: x['name'].lower())
+    return databases
+
 @app.route('/api/search-databases', methods=['GET'])
 def search_databases():
     """Search for SQLite database files within a package's data directory"""
@@ -243,40 +756,14 @@ def search_databases():
         package_name = request.args.get('package', app_config['package_name'])
         search_query = request.args.get('q', '').strip().lower()
 
-        # Build ADB command
-        adb_cmd = ['adb']
-        if device_serial:
-            adb_cmd.extend(['-s', device_serial])
-
-        # Use find to recursively search for db files
-        cmd = adb_cmd + ['shell', f'run-as {package_name} find . -name "*.db" -o -name "*.sqlite" -o -name "*.sqlite3" 2>/dev/null']
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-
-        databases = []
-        if result.returncode == 0:
-            for line in result.stdout.strip().split('\n'):
-                file_path = line.strip()
-                if not file_path:
-                    continue
-                # Clean up the path (remove leading ./)
-                if file_path.startswith('./'):
-                    file_path = file_path[2:]
-                file_name = file_path.split('/')[-1]
-                # Skip journal/wal/shm files
-                if file_name.endswith('-journal') or file_name.endswith('-wal') or file_name.endswith('-shm'):
-                    continue
-                databases.append({
-                    'name': file_name,
-                    'path': file_path
-                })
+        # Every search filters the same find result - scan the package once per LISTING_TTL
+        databases = cached_listing(('search', device_serial, package_name),
+                                   find_databases, device_serial, package_name)
 
         # Apply search filter if provided
         if search_query:
             databases = [db for db in databases if search_query in db['name'].lower() or search_query in db['path'].lower()]
 
-        # Sort by name
-        databases.sort(key=lambda x: x['name'].lower())
-
         return jsonify({
             'success': True,
             'databases': databases,
@@ -284,7 +771,7 @@ def search_databases():
         })
 
     except subprocess.TimeoutExpired:
-        return jsonify({'success': False, 'error': 'Search timed out'})
+        return jsonify({'success': False, 'error': f'Search timed out. {ADB_TIMEOUT_HINT}'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -293,42 +780,73 @@ def check_connection():
     """Check if ADB device is connected"""
     try:
         tool = get_adb_tool()
-        if not tool.check_adb_connection():
-            return jsonify({'success': False, 'error': 'No ADB device connected'})
-
-        if not tool.check_database_exists():
-            return jsonify({'success': False, 'error': 'Database not found on device'})
+        error = connection_error(tool)
+        if error:
+            return jsonify({'success': False, 'error': error})
 
         return jsonify({'success': True, 'message': 'Connected to device'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+def build_tables_payload(tool, counts_mode):
+    """
+    Build the /api/tables response body.
+
+    Args:
+        tool: SQLiteADBQueryTool to list tables with
+        counts_mode: 'estimate' or 'exact' to include row counts; anything else reports 0
+
+    Returns:
+        {'success': True, 'tables': [{'name', 'row_count'}, ...]}
+    """
+    # Get tables
+    tables = tool.get_table_list()
+    # The UI asks for every table's structure next - load them all in one query
+    tool.preload_table_info()
+
+    # Row counts for all tables come back from one batched query
+    counts = {}
+    if counts_mode in ('estimate', 'exact'):
+        counts = tool.get_table_counts(tables, exact=counts_mode == 'exact')
+
+    table_info = []
+    for table in tables:
+        table_info.append({
+            'name': table,
+            'row_count': counts.get(table, 0)
+        })
+
+    return {'success': True, 'tables': table_info}
+
 @app.route('/api/tables', methods=['GET'])
 def get_tables():
-    """Get list of all tables with row counts"""
+    """Get list of all tables with row counts (?counts=estimate or ?counts=exact; 0 otherwise)"""
     try:
+        counts_mode = request.args.get('counts', '')
         tool = get_adb_tool()
 
         # Check connection first
-        if not tool.check_adb_connection():
-            return jsonify({'success': False, 'error': 'No ADB device connected'})
-
-        if not tool.check_database_exists():
-            return jsonify({'success': False, 'error': 'Database not found on device'})
-
-        # Get tables
-        tables = tool.get_table_list()
-
-        # Get row counts for each table
-        table_info = []
-        for table in tables:
-            # count = tool.get_table_count(table)
-            table_info.append({
-                'name': table,
-                'row_count': 0
-            })
-
-        return jsonify({'success': True, 'tables': table_info})
+        error = connection_error(tool)
+        if error:
+            return jsonify({'success': False, 'error': error})
+
+        # One device stat per request: the ETag, the payload cache and the queries share its token
+        with tool.pin_change_token():
+            # Same database version as last time -> same listing
+            version = tool.get_data_version()
+            etag = data_etag(tool, version)
+            unchanged = not_modified(etag)
+            if unchanged:
+                return unchanged
+            cached = _tables_cache.get((tool, counts_mode))
+            if version and cached and cached[0] == version:
+                return with_etag(jsonify(cached[1]), etag)
+
+            # Identical requests arriving while this one is listing share its result
+            payload = _in_flight.run(('tables', tool, counts_mode, version), build_tables_payload, tool, counts_mode)
+            if version:
+                _tables_cache[(tool, counts_mode)] = (version, payload)
+            return with_etag(jsonify(payload), etag)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -339,15 +857,21 @@ def get_table_structure(table_name):
         tool = get_adb_tool()
 
         # Check connection first
-        if not tool.check_adb_connection():
+        if not device_connected(tool):
             return jsonify({'success': False, 'error': 'No ADB device connected'})
 
-        columns = tool.get_table_info(table_name)
+        # One device stat per request: the ETag and the schema cache share its token
+        with tool.pin_change_token():
+            etag = data_etag(tool, tool.get_data_version())
+            unchanged = not_modified(etag)
+            if unchanged:
+                return unchanged
+            columns = tool.get_table_info(table_name)
 
         if not columns:
             return jsonify({'success': False, 'error': f'Table {table_name} not found'})
 
-        return jsonify({'success': True, 'columns': columns})
+        return with_etag(jsonify({'success': True, 'columns': columns}), etag)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -358,6 +882,11 @@ def execute_query():
         data = request.json
         query = data.get('query', '').strip()
         limit = data.get('limit', 100)
+        try:
+            # The limit may arrive as a string ("100"); null means no limit
+            limit = None if limit is None else int(limit)
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': f'Invalid limit: {limit!r}'}), 400
 
         if not query:
             return jsonify({'success': False, 'error': 'No query provided'})
@@ -365,25 +894,25 @@ def execute_query():
         tool = get_adb_tool()
 
         # Check connection first
-        if not tool.check_adb_connection():
+        if not device_connected(tool):
             return jsonify({'success': False, 'error': 'No ADB device connected'})
 
         # Execute query
-        results = tool.execute_query(query, limit=limit)
+        fetched = fetch_rows(tool, query, limit=limit)
 
-        if results is None:
+        if fetched is None:
             error_msg = tool.last_error if tool.last_error else 'Query execution failed'
             return jsonify({'success': False, 'error': error_msg})
+        first, rows = fetched
 
         # Get column names from first result if available
-        columns = list(results[0].keys()) if results else []
+        columns = list(first.keys()) if first else []
 
-        return jsonify({
-            'success': True,
-            'columns': columns,
-            'rows': results,
-            'row_count': len(results)
-        })
+        # Rows go out as value arrays in column order - no repeated key strings per row
+        return stream_rows_response(
+            (list(map(row.get, columns)) for row in rows),
+            columns=columns
+        )
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -397,37 +926,56 @@ def get_table_data(table_name):
         # Support very large limits (for "All" option)
         if limit > 100000:
             limit = 100000  # Cap at 100k rows for safety
+        # A negative LIMIT means "no limit" to SQLite - don't let it bypass the cap
+        limit = max(limit, 0)
+        offset = max(offset, 0)
 
         tool = get_adb_tool()
 
         # Check connection first
-        if not tool.check_adb_connection():
+        if not device_connected(tool):
             return jsonify({'success': False, 'error': 'No ADB device connected'})
 
-        # Get table structure
-        columns_info = tool.get_table_info(table_name)
-        if not columns_info:
-            return jsonify({'success': False, 'error': f'Table {table_name} not found'})
-
-        # Get data
-        query = f"SELECT * FROM {table_name} LIMIT {limit} OFFSET {offset}"
-        results = tool.execute_query(query)
-
-        if results is None:
-            return jsonify({'success': False, 'error': 'Failed to fetch data'})
-
-        # Get total count
-        total_count = tool.get_table_count(table_name)
-
-        return jsonify({
-            'success': True,
-            'columns': [col['name'] for col in columns_info],
-            'rows': results,
-            'row_count': len(results),
-            'total_count': total_count,
-            'offset': offset,
-            'limit': limit
-        })
+        # One device stat per request: the ETag, the schema and the page query share its token
+        with tool.pin_change_token():
+            # Unchanged database + same page -> the browser's copy is still valid
+            etag = data_etag(tool, tool.get_data_version())
+            unchanged = not_modified(etag)
+            if unchanged:
+                return unchanged
+
+            # Get table structure
+            columns_info = tool.get_table_info(table_name)
+            if not columns_info:
+                return jsonify({'success': False, 'error': f'Table {table_name} not found'})
+
+            # Get data, with the total row count riding along as an extra column. The
+            # uncorrelated subquery runs once and keeps SQLite's fast COUNT(*) path
+            # (COUNT(*) OVER () would materialize the whole table instead).
+            table = tool._quote_ident(table_name)
+            query = (f"SELECT *, (SELECT COUNT(*) FROM {table}) AS {TOTAL_COUNT_COLUMN} "
+                     f"FROM {table} LIMIT {int(limit)} OFFSET {int(offset)}")
+            fetched = fetch_rows(tool, query, limit=limit)
+
+            if fetched is None:
+                return jsonify({'success': False, 'error': 'Failed to fetch data'})
+            first, rows = fetched
+
+            if first and TOTAL_COUNT_COLUMN in first:
+                total_count = first[TOTAL_COUNT_COLUMN]
+            else:
+                # Page past the end: no row to carry the count
+                total_count = tool.get_table_count(table_name)
+
+            # Rows go out as value arrays in column order (which also leaves out the count column)
+            columns = [col['name'] for col in columns_info]
+            return with_etag(stream_rows_response(
+                (list(map(row.get, columns)) for row in rows),
+                columns=columns,
+                total_count=total_count,
+                offset=offset,
+                limit=limit
+            ), etag)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -437,7 +985,12 @@ def clear_cache():
     try:
         tool = get_adb_tool()
 
-        if tool.clear_cache():
+        with tool_write_lock:
+            cleared = tool.clear_cache()
+            _probe_cache.clear()
+            _drop_tables_cache(tool)
+
+        if cleared:
             return jsonify({
                 'success': True,
                 'message': 'Cache cleared successfully'
@@ -454,63 +1007,14 @@ def clear_cache():
 def force_pull():
     """Force pull fresh database from device (clears cache first)"""
     try:
-        import tempfile
-        from pathlib import Path
-
         tool = get_adb_tool()
 
         # Check connection first
-        if not tool.check_adb_connection():
-            return jsonify({'success': False, 'error': 'No ADB device connected'})
-
-        if not tool.check_database_exists():
-            return jsonify({'success': False, 'error': 'Database not found on device'})
-
-        # Clear cache first
-        tool.clear_cache()
-
-        # Force pull with cache enabled (so it saves to cache directory)
-        # but force_pull=True bypasses the cache check and re-pulls
-        tool_force = SQLiteADBQueryTool(
-            package_name=app_config['package_name'],
-            db_name=app_config['db_name'],
-            force_local=True,
-            use_cache=True,
-            force_pull=True,
-            device_serial=app_config['device_serial'] if app_config['device_serial'] else None
-        )
-
-        # Pull fresh database
-        if not tool_force.pull_database():
-            return jsonify({'success': False, 'error': 'Failed to pull database from device'})
-
-        # Fix gzip decompression issue
-        cache_dir = Path(tempfile.gettempdir()) / "adb_sqlite_cache"
-        db_file = cache_dir / f"{app_config['package_name']}_{app_config['db_name']}"
-
-        if db_file.exists():
-            # Check if file is gzipped (Windows compatible check)
-            try:
-                with open(db_file, 'rb') as f:
-                    magic = f.read(2)
-                if magic == b'\x1f\x8b':  # gzip magic number
-                    print(f"Detected gzipped database, decompressing...")
-                    import gzip
-                    import shutil
-                    gz_file = str(db_file) + '.gz'
-                    db_file.rename(gz_file)
-                    with gzip.open(gz_file, 'rb') as f_in:
-                        with open(db_file, 'wb') as f_out:
-                            shutil.copyfileobj(f_in, f_out)
-                    os.unlink(gz_file)
-                    print(f"Database decompressed successfully")
-            except Exception as e:
-                print(f"Warning: Could not check/decompress file: {e}")
+        error = connection_error(tool)
+        if error:
+            return jsonify({'success': False, 'error': error})
 
-        return jsonify({
-            'success': True,
-            'message': 'Fresh database pulled from device (cache bypassed)'
-        })
+        return start_pull(tool, 'Fresh database pulled from device (cache bypassed)')
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -518,55 +1022,32 @@ def force_pull():
 def refresh_database():
     """Force refresh database from device"""
     try:
-        import tempfile
-        from pathlib import Path
-
         tool = get_adb_tool()
+        # The app may have been reinstalled or the device swapped - probe everything again
+        tool.reset_probes()
+        _probe_cache.clear()
 
         # Check connection first
-        if not tool.check_adb_connection():
-            return jsonify({'success': False, 'error': 'No ADB device connected'})
-
-        if not tool.check_database_exists():
-            return jsonify({'success': False, 'error': 'Database not found on device'})
+        error = connection_error(tool)
+        if error:
+            return jsonify({'success': False, 'error': error})
 
         # Clear cache and force pull
-        tool.clear_cache()
-
-        # Pull fresh database
-        if not tool.pull_database():
-            return jsonify({'success': False, 'error': 'Failed to pull database from device'})
-
-        # Fix gzip decompression issue
-        cache_dir = Path(tempfile.gettempdir()) / "adb_sqlite_cache"
-        db_file = cache_dir / f"{app_config['package_name']}_{app_config['db_name']}"
-
-        if db_file.exists():
-            # Check if file is gzipped (Windows compatible check)
-            try:
-                with open(db_file, 'rb') as f:
-                    magic = f.read(2)
-                if magic == b'\x1f\x8b':  # gzip magic number
-                    print(f"Detected gzipped database, decompressing...")
-                    import gzip
-                    import shutil
-                    gz_file = str(db_file) + '.gz'
-                    db_file.rename(gz_file)
-                    with gzip.open(gz_file, 'rb') as f_in:
-                        with open(db_file, 'wb') as f_out:
-                            shutil.copyfileobj(f_in, f_out)
-                    os.unlink(gz_file)
-                    print(f"Database decompressed successfully")
-            except Exception as e:
-                print(f"Warning: Could not check/decompress file: {e}")
-
-        return jsonify({
-            'success': True,
-            'message': 'Database refreshed successfully from device'
-        })
+        return start_pull(tool, 'Database refreshed successfully from device')
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/pull-status/<job_id>', methods=['GET'])
+def pull_status(job_id):
+    """Get the state of a background database pull"""
+    with _pull_jobs_lock:
+        job = _pull_jobs.get(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': 'Unknown pull job'}), 404
+        status = {key: value for key, value in job.items() if key != 'tool'}
+
+    return jsonify({'success': status['state'] != 'error', 'job_id': job_id, **status})
+
 if __name__ == '__main__':
     # Load Flask configuration from environment
     FLASK_HOST = os.getenv('FLASK_HOST', '0.0.0.0')
@@ -575,4 +1056,5 @@ if __name__ == '__main__':
 
     print("Starting ADB SQLite Query Viewer...")
     print(f"Open http://localhost:{FLASK_PORT} in your browser")
-    app.run(debug=FLASK_DEBUG, host=FLASK_HOST, port=FLASK_PORT)
+    print("⚠️  Development server - for heavier use run: gunicorn -w 1 -k gthread --threads 8 wsgi:app")
+    app.run(debug=FLASK_DEBUG, host=FLASK_HOST, port=FLASK_PORT, threaded=True)
@@ -0,0 +1,49 @@
+#!/bin/bash
+# Rebuild the bundled sqlite3-arm64 CLI (pushed to devices that have no sqlite3)
+#
+# Requires the Android NDK: set ANDROID_NDK_HOME to its install directory.
+# Usage: ./build_sqlite3_arm64.sh
+
+set -e
+
+# SQLite amalgamation to build (the shipped binary is 3.50.4)
+SQLITE_YEAR=${SQLITE_YEAR:-2025}
+SQLITE_VERSION=${SQLITE_VERSION:-3500400}
+ANDROID_API=${ANDROID_API:-21}
+
+if [ -z "$ANDROID_NDK_HOME" ]; then
+    echo "ANDROID_NDK_HOME is not set"
+    exit 1
+fi
+
+HOST_TAG="$(uname -s | tr '[:upper:]' '[:lower:]')-x86_64"
+CC="$ANDROID_NDK_HOME/toolchains/llvm/prebuilt/$HOST_TAG/bin/aarch64-linux-android${ANDROID_API}-clang"
+STRIP="$ANDROID_NDK_HOME/toolchains/llvm/prebuilt/$HOST_TAG/bin/llvm-strip"
+
+BUILD_DIR=$(mktemp -d)
+trap 'rm -rf "$BUILD_DIR"' EXIT
+
+AMALGAMATION="sqlite-amalgamation-$SQLITE_VERSION"
+echo "Downloading $AMALGAMATION..."
+curl -fsSL -o "$BUILD_DIR/$AMALGAMATION.zip" "https://www.sqlite.org/$SQLITE_YEAR/$AMALGAMATION.zip"
+unzip -q "$BUILD_DIR/$AMALGAMATION.zip" -d "$BUILD_DIR"
+
+# The CLI runs one query per process: no threads, no memory accounting.
+# armv8-a+crc+crypto enables the CRC32/PMULL instructions present on all 64-bit Android devices.
+echo "Compiling..."
+"$CC" -O3 -march=armv8-a+crc+crypto -mtune=cortex-a76 \
+    -DSQLITE_THREADSAFE=0 \
+    -DSQLITE_DEFAULT_MEMSTATUS=0 \
+    -DSQLITE_LIKE_DOESNT_MATCH_BLOBS \
+    -DSQLITE_MAX_EXPR_DEPTH=0 \
+    -DSQLITE_OMIT_DEPRECATED \
+    -DSQLITE_ENABLE_FTS5 \
+    -DSQLITE_ENABLE_JSON1 \
+    "$BUILD_DIR/$AMALGAMATION/shell.c" "$BUILD_DIR/$AMALGAMATION/sqlite3.c" \
+    -o "$BUILD_DIR/sqlite3" -lm
+
+"$STRIP" "$BUILD_DIR/sqlite3"
+mv "$BUILD_DIR/sqlite3" sqlite3-arm64
+
+echo "✅ Built sqlite3-arm64"
+file sqlite3-arm64
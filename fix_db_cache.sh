@@ -20,16 +20,14 @@ if [ ! -f "$DB_FILE" ]; then
     exit 1
 fi
 
-# Check if file is gzipped
-FILE_TYPE=$(file "$DB_FILE" | grep -o "gzip compressed data")
+# Check if file is gzipped (magic number 1f 8b - no need to load file(1)'s magic database)
+MAGIC=$(head -c 2 "$DB_FILE" | od -An -tx1 | tr -d ' \n')
 
-if [ -n "$FILE_TYPE" ]; then
+if [ "$MAGIC" = "1f8b" ]; then
     echo "Database is gzipped, decompressing..."
     mv "$DB_FILE" "$DB_FILE.gz"
     gunzip "$DB_FILE.gz"
     echo "✅ Database decompressed successfully"
-    file "$DB_FILE"
 else
     echo "✅ Database is already decompressed"
-    file "$DB_FILE"
 fi
@@ -0,0 +1,100 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adb_sqlite_query_tool import AdbShellSession, SQLiteADBQueryTool
+
+
+class TransactionScriptTest(unittest.TestCase):
+    """Batched writes sent to the device's sqlite3 CLI by execute_many"""
+
+    QUERIES = [
+        "INSERT INTO t VALUES (1) -- trailing comment",
+        "INSERT INTO t VALUES (2);",
+        "INSERT INTO t VALUES (3); -- comment after the semicolon",
+    ]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'test.db')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def rows(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return [row[0] for row in conn.execute("SELECT x FROM t ORDER BY x")]
+
+    @unittest.skipUnless(shutil.which('sqlite3'), "sqlite3 CLI not installed")
+    def test_trailing_comment_does_not_swallow_later_statements(self):
+        script = SQLiteADBQueryTool._transaction_script(self.QUERIES)
+        result = subprocess.run(['sqlite3', self.db_path, '-bail'], input=script,
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(self.rows(), [1, 2, 3])
+
+    def test_failed_statement_rolls_back_the_batch(self):
+        script = SQLiteADBQueryTool._transaction_script(self.QUERIES + ["INSERT INTO missing VALUES (4)"])
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        with self.assertRaises(sqlite3.OperationalError):
+            conn.executescript(script)
+        conn.close()
+        self.assertEqual(self.rows(), [])
+
+
+# Stand-ins for `adb` (the session appends 'shell', which they ignore): a local sh, and a
+# local sh whose output gets the \r\n line endings of a device shell running on a pty
+LOCAL_SHELL = ['sh', '-c', 'exec sh', 'adb']
+PTY_SHELL = [sys.executable, '-c', """
+import subprocess, sys
+sh = subprocess.Popen(['sh'], stdin=sys.stdin, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+for chunk in iter(lambda: sh.stdout.read1(65536), b''):
+    sys.stdout.buffer.write(chunk.replace(b'\\n', b'\\r\\n'))
+    sys.stdout.buffer.flush()
+"""]
+
+
+@unittest.skipUnless(shutil.which('sh'), "sh not installed")
+class AdbShellSessionTest(unittest.TestCase):
+    """Commands framed by the session's sentinel line"""
+
+    def run_commands(self, adb_cmd, *commands):
+        session = AdbShellSession(adb_cmd)
+        try:
+            return [session.run(command, timeout=10) for command in commands]
+        finally:
+            session.close()
+
+    def test_output_and_exit_status(self):
+        echoed, failed, stderr = self.run_commands(LOCAL_SHELL, 'echo abc', 'echo oops; (exit 3)', 'echo err >&2')
+        self.assertEqual((echoed.stdout, echoed.returncode), ('abc\n', 0))
+        self.assertEqual((failed.stdout, failed.returncode), ('oops\n', 3))
+        self.assertEqual((stderr.stdout, stderr.returncode), ('err\n', 0))
+
+    def test_output_without_trailing_newline(self):
+        printed, empty = self.run_commands(LOCAL_SHELL, 'printf abc', 'true')
+        self.assertEqual((printed.stdout, printed.returncode), ('abc', 0))
+        self.assertEqual((empty.stdout, empty.returncode), ('', 0))
+
+    def test_crlf_line_endings(self):
+        echoed, printed, failed = self.run_commands(PTY_SHELL, 'echo abc', 'printf abc', 'false')
+        self.assertEqual((echoed.stdout, echoed.returncode), ('abc\r\n', 0))
+        self.assertEqual((printed.stdout, printed.returncode), ('abc', 0))
+        self.assertEqual((failed.stdout, failed.returncode), ('', 1))
+
+    def test_shell_exit_reports_255(self):
+        exited, restarted = self.run_commands(LOCAL_SHELL, 'exit 0', 'echo back')
+        self.assertEqual(exited.returncode, 255)
+        self.assertEqual((restarted.stdout, restarted.returncode), ('back\n', 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
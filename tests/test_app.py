@@ -0,0 +1,135 @@
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+
+class TTLCacheTest(unittest.TestCase):
+    """Short-lived probe results shared by bursts of requests"""
+
+    def test_entry_expires_after_ttl(self):
+        cache = app.TTLCache(0.2)
+        cache.set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
+        time.sleep(0.3)
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.get('key', 'default'), 'default')
+
+    def test_set_restarts_ttl(self):
+        cache = app.TTLCache(0.2)
+        cache.set('key', 'old')
+        time.sleep(0.3)
+        cache.set('key', 'new')
+        self.assertEqual(cache.get('key'), 'new')
+
+    def test_clear(self):
+        cache = app.TTLCache(60)
+        cache.set('key', 'value')
+        cache.clear()
+        self.assertIsNone(cache.get('key'))
+
+
+class SingleFlightTest(unittest.TestCase):
+    """Identical calls in flight at the same time run once"""
+
+    def run_with_waiter(self, fn):
+        """Run fn as the leader's call while a second caller of the same key waits; returns both outcomes."""
+        flight = app.SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+        outcome = {}
+
+        def leader_fn():
+            started.set()
+            release.wait(5)
+            calls.append('leader')
+            return fn()
+
+        def waiter_fn():
+            calls.append('waiter')
+
+        def call(name, fn):
+            try:
+                outcome[name] = flight.run('key', fn)
+            except Exception as e:
+                outcome[name] = e
+
+        leader = threading.Thread(target=call, args=('leader', leader_fn))
+        leader.start()
+        started.wait(5)
+        waiter = threading.Thread(target=call, args=('waiter', waiter_fn))
+        waiter.start()
+        time.sleep(0.1)  # Let the waiter block on the leader's call
+        release.set()
+        leader.join(5)
+        waiter.join(5)
+        self.assertEqual(calls, ['leader'])
+        return outcome
+
+    def test_waiter_shares_result(self):
+        outcome = self.run_with_waiter(lambda: 42)
+        self.assertEqual(outcome, {'leader': 42, 'waiter': 42})
+
+    def test_waiter_gets_leader_exception(self):
+        error = RuntimeError("device disconnected")
+
+        def fail():
+            raise error
+
+        outcome = self.run_with_waiter(fail)
+        self.assertIs(outcome['leader'], error)
+        self.assertIs(outcome['waiter'], error)
+
+    def test_key_is_released_after_failure(self):
+        flight = app.SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.run('key', int, 'not a number')
+        self.assertEqual(flight.run('key', int, '7'), 7)
+
+
+class StreamRowsResponseTest(unittest.TestCase):
+    """Row responses written in batches"""
+
+    def body(self, rows, **fields):
+        with app.app.test_request_context():
+            response = app.stream_rows_response(rows, **fields)
+            return json.loads(b''.join(response.response))
+
+    def test_no_rows(self):
+        self.assertEqual(self.body([], columns=[]),
+                         {'columns': [], 'rows': [], 'row_count': 0, 'success': True})
+
+    def test_no_fields(self):
+        self.assertEqual(self.body([]), {'rows': [], 'row_count': 0, 'success': True})
+
+    def test_one_row(self):
+        self.assertEqual(self.body(iter([[1, 'a']]), columns=['id', 'name']),
+                         {'columns': ['id', 'name'], 'rows': [[1, 'a']], 'row_count': 1, 'success': True})
+
+    def test_rows_across_batches(self):
+        count = app.STREAM_BATCH_ROWS * 2 + 1
+        body = self.body(([i, None] for i in range(count)), columns=['id', 'value'])
+        self.assertTrue(body['success'])
+        self.assertEqual(body['row_count'], count)
+        self.assertEqual(body['rows'], [[i, None] for i in range(count)])
+
+    def test_error_mid_stream_ends_valid_json(self):
+        def rows():
+            yield from ([i] for i in range(app.STREAM_BATCH_ROWS))
+            raise RuntimeError("database disk image is malformed")
+
+        body = self.body(rows(), columns=['id'])
+        self.assertFalse(body['success'])
+        self.assertEqual(body['error'], "database disk image is malformed")
+        self.assertEqual(body['row_count'], app.STREAM_BATCH_ROWS)
+        self.assertEqual(len(body['rows']), app.STREAM_BATCH_ROWS)
+
+
+if __name__ == '__main__':
+    unittest.main()
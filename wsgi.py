@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for serving the web viewer with a production server, e.g.:
+
+    gunicorn -w 1 -k gthread --threads 8 -b 0.0.0.0:5001 wsgi:app
+    waitress-serve --threads=8 --listen=0.0.0.0:5001 wsgi:app   (Windows/macOS)
+    gunicorn -w 1 -k gevent --worker-connections 1000 -b 0.0.0.0:5001 wsgi:app
+
+Use one worker process and scale with threads (or greenlets): the tools, probe
+results and the pulled database cache are shared in-process, and separate worker
+processes would each pull into the same cache file.
+
+The gevent worker (pip install gevent) monkey-patches the app before loading it, so
+requests waiting on adb subprocesses yield to each other. Queries against the local
+database copy run in sqlite3's C code and hold up the other requests while they run;
+prefer gthread when working mostly with --force-local / FORCE_LOCAL.
+"""
+
+from app import app
+
+if __name__ == '__main__':
+    app.run()